@@ -0,0 +1,135 @@
+"""Benchmark pkgconf-pypi in synthetic environments of increasing size.
+
+For each size, a synthetic environment is created (see synthetic_env.py), and
+the following are measured, running each command in a new process:
+
+- ``interpreter``: interpreter start-up (``python -c pass``)
+- ``import``: interpreter start-up, plus importing pkgconf
+- ``path-cold``/``path-warm``: get_pkg_config_path(), with an empty cache, and
+  with the cache from the previous run
+- ``query-cold``/``query-warm``: a pkgconf-pypi query, with an empty cache, and
+  with the cache from the previous run
+- ``pkgconf``: the same query, running the pkgconf executable directly, with the
+  PKG_CONFIG_PATH calculated by pkgconf-pypi, which is the subprocess cost that
+  pkgconf-pypi can't avoid
+
+The minimum and median wall times, over the repetitions, are printed as a table,
+and can also be written as JSON, to compare runs.
+
+Usage: python benchmarks/run.py [--sizes 10,100,1000,10000] [--repeat N] [--json FILE]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic_env
+
+import pkgconf
+
+
+_QUERY_CODE = """\
+import sys
+from pkgconf.__main__ import _python_aware_entrypoint
+sys.argv[1:] = {args!r}
+_python_aware_entrypoint()
+"""
+
+
+def _python(env_path: pathlib.Path) -> str:
+    scripts = 'Scripts' if os.name == 'nt' else 'bin'
+    return os.fspath(env_path / scripts / ('python.exe' if os.name == 'nt' else 'python'))
+
+
+def _time(cmd: list[str], env: dict[str, str], before: list[str] | None = None) -> float:
+    """Run ``cmd``, and return its wall time. If ``before`` is given, it is run first, without being timed."""
+    if before:
+        subprocess.run(before, env=env, check=True, capture_output=True)
+    start = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def benchmark(env_path: pathlib.Path, pkg_config: int, repeat: int) -> dict[str, dict[str, float]]:
+    """Run the benchmarks in the synthetic environment at ``env_path``."""
+    python = _python(env_path)
+    cache_dir = env_path / 'cache'
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(('PKGCONF_PYPI_', 'PKG_CONFIG_')) and key != 'VIRTUAL_ENV'
+    }
+    env.update(PKGCONF_PYPI_CACHE_DIR=os.fspath(cache_dir), PKGCONF_PYPI_NO_DAEMON='1')
+    clear_cache = [python, '-c', f'import shutil; shutil.rmtree({os.fspath(cache_dir)!r}, ignore_errors=True)']
+    # The last .pc file requires the other ones in its chain
+    query = ['--cflags', f'lib{pkg_config - 1}'] if pkg_config else ['--exists', 'lib0']
+    path_cmd = [python, '-c', 'import pkgconf; pkgconf.get_pkg_config_path()']
+    query_cmd = [python, '-c', _QUERY_CODE.format(args=query)]
+
+    process = subprocess.run(
+        [python, '-c', 'import os, pkgconf; print(os.pathsep.join(pkgconf.get_pkg_config_path()))'],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    pkgconf_env = dict(env, PKG_CONFIG_PATH=process.stdout.strip())
+    pkgconf_cmd = [os.fspath(pkgconf.get_executable()), *query]
+
+    commands = {
+        'interpreter': lambda: _time([python, '-c', 'pass'], env),
+        'import': lambda: _time([python, '-c', 'import pkgconf'], env),
+        'path-cold': lambda: _time(path_cmd, env, before=clear_cache),
+        'path-warm': lambda: _time(path_cmd, env, before=path_cmd),
+        'query-cold': lambda: _time(query_cmd, env, before=clear_cache),
+        'query-warm': lambda: _time(query_cmd, env, before=query_cmd),
+        'pkgconf': lambda: _time(pkgconf_cmd, pkgconf_env),
+    }
+    results = {}
+    for name, run in commands.items():
+        times = [run() for _ in range(repeat)]
+        results[name] = {'min': min(times), 'median': statistics.median(times)}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--sizes', default='10,100,1000,10000', help='numbers of distributions (default: 10,100,1000,10000)')
+    parser.add_argument(
+        '--pkg-config-ratio', type=float, default=0.5, help='ratio with a pkg_config entrypoint (default: 0.5)'
+    )
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions of each measurement (default: 5)')
+    parser.add_argument('--json', help='file to write the results to, as JSON')
+    parser.add_argument('--keep', help='directory to keep the synthetic environments in, instead of a temporary one')
+    args = parser.parse_args()
+
+    workdir = pathlib.Path(args.keep or tempfile.mkdtemp(prefix='pkgconf-benchmark-'))
+    results = {}
+    try:
+        for size in map(int, args.sizes.split(',')):
+            pkg_config = int(size * args.pkg_config_ratio)
+            env_path = workdir / f'env-{size}'
+            if not env_path.exists():
+                synthetic_env.create(env_path, size, pkg_config)
+            results[size] = benchmark(env_path, pkg_config, args.repeat)
+            print(f'{size} distributions ({pkg_config} with a pkg_config entrypoint):')
+            for name, result in results[size].items():
+                print(f'  {name:>12}: {result["min"] * 1000:9.1f}ms min {result["median"] * 1000:9.1f}ms median')
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        data = {'python': sys.version, 'pkgconf': pkgconf.__version__, 'results': results}
+        pathlib.Path(args.json).write_text(json.dumps(data, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Generate synthetic Python environments, to benchmark pkgconf-pypi.
+
+The environment is a virtual environment, with pkgconf-pypi importable from it
+(via a .pth file pointing to the pkgconf package used to run this script), and
+``distributions`` fake distributions, written directly to site-packages. The
+first ``pkg_config`` of them register a pkg_config entrypoint, and cycle through
+the following kinds:
+
+- ``plain``: regular package, listed in the distribution RECORD
+- ``namespace``: namespace package, which needs the import system to be resolved
+- ``editable``: regular package outside site-packages, added to sys.path by a
+  .pth file, like a path-based editable install
+- ``broken``: package whose parent package raises an exception when imported
+
+Each one ships a ``lib<index>.pc`` file, which requires the one before it, in
+chains of ``chain`` packages, so that queries need to walk dependency trees.
+
+Usage: python benchmarks/synthetic_env.py PATH [--distributions N] [--pkg-config M]
+"""
+
+import argparse
+import os
+import pathlib
+import sysconfig
+import venv
+
+import pkgconf
+
+
+KINDS = ('plain', 'namespace', 'editable', 'broken')
+
+_PC_TEMPLATE = """\
+prefix=${{pcfiledir}}
+includedir=${{prefix}}/include
+libdir=${{prefix}}/lib
+
+Name: lib{index}
+Description: Synthetic library {index}
+Version: 1.0.{index}
+Requires: {requires}
+Cflags: -I${{includedir}} -DLIB{index}
+Libs: -L${{libdir}} -l{index}
+"""
+
+
+def site_packages(path: os.PathLike[str] | str) -> pathlib.Path:
+    """Get the site-packages directory of the virtual environment at ``path``."""
+    scheme = 'venv' if 'venv' in sysconfig.get_scheme_names() else None
+    paths = sysconfig.get_paths(scheme, vars={'base': os.fspath(path), 'platbase': os.fspath(path)})
+    return pathlib.Path(paths['purelib'])
+
+
+def kind(index: int) -> str:
+    return KINDS[index % len(KINDS)]
+
+
+def _write(path: pathlib.Path, content: str = '') -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def _write_distribution(site: pathlib.Path, name: str, files: dict[str, str], entry_points: dict[str, str]) -> None:
+    for file, content in files.items():
+        _write(site / file, content)
+    dist_info = f'{name}-1.0.dist-info'
+    metadata = {
+        f'{dist_info}/METADATA': f'Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n',
+        f'{dist_info}/INSTALLER': 'synthetic\n',
+    }
+    if entry_points:
+        entries = ''.join(f'{key} = {value}\n' for key, value in entry_points.items())
+        metadata[f'{dist_info}/entry_points.txt'] = f'[pkg_config]\n{entries}'
+    for file, content in metadata.items():
+        _write(site / file, content)
+    records = [*files, *metadata, f'{dist_info}/RECORD']
+    _write(site / dist_info / 'RECORD', ''.join(f'{record},,\n' for record in records))
+
+
+def _pkg_config_distribution(root: pathlib.Path, site: pathlib.Path, index: int, chain: int) -> None:
+    name = f'synthetic_{index}'
+    requires = f'lib{index - 1}' if index % chain else ''
+    pc_file = _PC_TEMPLATE.format(index=index, requires=requires)
+    files: dict[str, str] = {}
+    if kind(index) == 'plain':
+        value = name
+        files[f'{name}/__init__.py'] = ''
+        files[f'{name}/lib{index}.pc'] = pc_file
+    elif kind(index) == 'namespace':
+        value = f'{name}.pkgconfig'
+        files[f'{name}/pkgconfig/lib{index}.pc'] = pc_file
+    elif kind(index) == 'editable':
+        value = name
+        _write(root / 'src' / name / '__init__.py')
+        _write(root / 'src' / name / f'lib{index}.pc', pc_file)
+        files[f'__editable__.{name}.pth'] = f'{root / "src"}\n'
+    else:
+        value = f'{name}.pkgconfig'
+        files[f'{name}/__init__.py'] = f'raise RuntimeError("{name} fails on import")\n'
+        files[f'{name}/pkgconfig/__init__.py'] = ''
+        files[f'{name}/pkgconfig/lib{index}.pc'] = pc_file
+    _write_distribution(site, name, files, {name: value})
+
+
+def create(
+    path: os.PathLike[str] | str,
+    distributions: int,
+    pkg_config: int | None = None,
+    chain: int = 10,
+) -> pathlib.Path:
+    """Create a synthetic environment at ``path``, and return its site-packages directory.
+
+    :param distributions: Total number of distributions.
+    :param pkg_config: Number of distributions registering a pkg_config
+        entrypoint, defaults to half of them.
+    :param chain: Length of the Requires chains of the .pc files.
+    """
+    if pkg_config is None:
+        pkg_config = distributions // 2
+    if not 0 <= pkg_config <= distributions:
+        msg = f'Invalid number of pkg_config distributions: {pkg_config}'
+        raise ValueError(msg)
+
+    root = pathlib.Path(path)
+    venv.create(root, with_pip=False, symlinks=os.name != 'nt')
+    site = site_packages(root)
+    # Make the pkgconf package used to run this script importable
+    _write(site / '_pkgconf_benchmark.pth', f'{pathlib.Path(pkgconf.__path__[0]).parent}\n')
+
+    for index in range(pkg_config):
+        _pkg_config_distribution(root, site, index, chain)
+    for index in range(pkg_config, distributions):
+        name = f'synthetic_{index}'
+        _write_distribution(site, name, {f'{name}/__init__.py': ''}, {})
+    return site
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('path', help='path of the virtual environment to create')
+    parser.add_argument('--distributions', type=int, default=100, help='number of distributions (default: 100)')
+    parser.add_argument('--pkg-config', type=int, help='number of distributions with a pkg_config entrypoint (default: half)')
+    parser.add_argument('--chain', type=int, default=10, help='length of the .pc Requires chains (default: 10)')
+    args = parser.parse_args()
+    print(create(args.path, args.distributions, args.pkg_config, args.chain))
+
+
+if __name__ == '__main__':
+    main()
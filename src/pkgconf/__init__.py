@@ -1,32 +1,75 @@
-import logging
+# This module is imported by the command line entrypoints, so, to keep their
+# start-up fast, it only imports what they always need, and everything else
+# (the standard library modules, our submodules, and the loggers) is imported
+# when first used. See tests/test_import_time.py.
+from __future__ import annotations
+
 import os
-import pathlib
-import shlex
-import shutil
-import subprocess
-import sysconfig
 import warnings
 
-from typing import Any
+import pkgconf
+
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import logging
+    import pathlib
+    import subprocess
+
+    from collections.abc import Callable, Iterable, Mapping, Sequence
+    from typing import Any
 
-import pkgconf._path_entrypoints
+    import pkgconf._cache
+    import pkgconf._daemon
+    import pkgconf._overlay
+    import pkgconf._path_entrypoints
+    import pkgconf._pc
+    import pkgconf._trace
 
-from pkgconf._path_entrypoints import PathWarning
+    from pkgconf._path_entrypoints import PathWarning
+
+    _LOGGER: logging.Logger
+    _CLI_LOGGER: logging.Logger
 
 
 __version__ = '2.5.1-2'
 
 
-_LOGGER = logging.getLogger(__name__)
-_CLI_LOGGER = _LOGGER.getChild('cli')
+_LAZY_SUBMODULES = frozenset({'_cache', '_daemon', '_overlay', '_path_entrypoints', '_pc', '_trace'})
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_SUBMODULES:
+        # Not importlib.import_module, which isn't reported by -X importtime
+        __import__(f'{__name__}.{name}')
+        return globals()[name]
+    if name == 'PathWarning':
+        return pkgconf._path_entrypoints.PathWarning
+    if name in ('_LOGGER', '_CLI_LOGGER'):
+        import logging
 
+        globals()['_LOGGER'] = logging.getLogger(__name__)
+        globals()['_CLI_LOGGER'] = logging.getLogger(__name__).getChild('cli')
+        return globals()[name]
+    msg = f'module {__name__!r} has no attribute {name!r}'
+    raise AttributeError(msg)
 
-def _get_system_executable() -> pathlib.Path | None:
-    if os.environ.get('PKGCONF_PYPI_EMBEDDED_ONLY'):
+
+def _get_system_executable(env: Mapping[str, str] = os.environ) -> pathlib.Path | None:
+    with pkgconf._trace.span('find system executable', 'discovery'):
+        return _find_system_executable(env)
+
+
+def _find_system_executable(env: Mapping[str, str]) -> pathlib.Path | None:
+    import pathlib
+    import shutil
+    import sysconfig
+
+    if env.get('PKGCONF_PYPI_EMBEDDED_ONLY'):
         return None
 
     scripts = sysconfig.get_path('scripts')
-    path_list = os.environ.get('PATH', os.defpath).split(os.pathsep)
+    path_list = env.get('PATH', os.defpath).split(os.pathsep)
     if scripts in path_list:
         path_list.remove(scripts)
     path = os.pathsep.join(path_list)
@@ -37,10 +80,8 @@ def _get_system_executable() -> pathlib.Path | None:
     return None
 
 
-def _get_executable() -> pathlib.Path | None:
-    """Get the bundled pkgconf executable."""
-    executable: pathlib.Path | None
-
+def _executable_path() -> str | None:
+    """Get the path of the bundled pkgconf executable, without importing anything (see _vanilla_entrypoint)."""
     if os.name == 'posix':
         executable_name = 'pkgconf'
     elif os.name == 'nt':
@@ -49,9 +90,19 @@ def _get_executable() -> pathlib.Path | None:
         raise NotImplementedError
 
     for path in __path__:
-        executable = pathlib.Path(path) / '.bin' / executable_name
-        if executable.exists():
+        executable = os.path.join(path, '.bin', executable_name)
+        if os.path.exists(executable):
             return executable
+    return None
+
+
+def _get_executable() -> pathlib.Path | None:
+    """Get the bundled pkgconf executable."""
+    import pathlib
+
+    with pkgconf._trace.span('find executable', 'discovery'):
+        executable = _executable_path()
+    return pathlib.Path(executable) if executable else None
 
 
 def get_executable() -> pathlib.Path:
@@ -67,11 +118,11 @@ def get_executable() -> pathlib.Path:
     raise RuntimeError(msg)
 
 
-def _entry_points() -> list[pkgconf._path_entrypoints.EntryPoint]:
-    return pkgconf._path_entrypoints.entry_points(group='pkg_config')
+def _entry_points(strategy: str | None = None) -> list[pkgconf._path_entrypoints.EntryPoint]:
+    return pkgconf._path_entrypoints.entry_points(group='pkg_config', strategy=strategy)
 
 
-def get_pkg_config_path() -> list[str]:
+def get_pkg_config_path(strategy: str | None = None) -> list[str]:
     """Calculate PKG_CONFIG_PATH for Python packages in the current environment.
 
     Python packages may register a directory for their pkg-config files by
@@ -80,29 +131,323 @@ def get_pkg_config_path() -> list[str]:
     TODO: Document the entrypoint creation and point to that here.
     [project.entry-points.pkg-config]
     entrypoint-name = 'project.package'
+
+    The result is cached on disk, keyed by a fingerprint of the environment, so
+    that it only needs to be recalculated when distributions are installed or
+    removed. Set PKGCONF_PYPI_NO_CACHE to disable the cache.
+
+    :param strategy: Entrypoint path resolution strategy, either
+        ``import-system`` (default) or ``translation-first``. The default can be
+        set via the PKGCONF_PYPI_RESOLUTION_STRATEGY environment variable.
     """
-    return [ep.path for ep in _entry_points()]
+    return _get_pkg_config_path(strategy)[0]
+
+
+def _get_pkg_config_path(
+    strategy: str | None = None,
+) -> tuple[list[str], list[pkgconf._path_entrypoints.EntryPoint] | None]:
+    """Same as get_pkg_config_path, but also return the resolved entrypoints, unless the path was cached."""
+    with pkgconf._trace.span('calculate PKG_CONFIG_PATH', cached=False) as trace_args:
+        if not pkgconf._cache.enabled():
+            eps = _entry_points(strategy)
+            return [ep.path for ep in eps], eps
+
+        fingerprint = pkgconf._cache.environment_fingerprint(strategy)
+        if (path := pkgconf._cache.load_pkg_config_path(fingerprint)) is not None:
+            pkgconf._LOGGER.debug('Using cached PKG_CONFIG_PATH')
+            trace_args['cached'] = True
+            return path, None
 
+        eps = _entry_points(strategy)
+        path = [ep.path for ep in eps]
+        pkgconf._cache.store_pkg_config_path(fingerprint, path)
+        return path, eps
 
-def run_pkgconf(*args: str, **subprocess_kwargs: Any) -> subprocess.CompletedProcess[bytes | str]:
+
+def _pkgconf_env(base_env: Mapping[str, str], pkg_config_path: list[str]) -> dict[str, str]:
+    """Make the pkgconf environment, by appending pkg_config_path to PKG_CONFIG_PATH.
+
+    If the overlay is enabled (PKGCONF_PYPI_OVERLAY), pkg_config_path is
+    replaced by a single directory containing all its .pc files.
+    """
+    if pkg_config_path and pkgconf._overlay.enabled(base_env):
+        if overlay := pkgconf._overlay.overlay_dir(pkg_config_path):
+            pkg_config_path = [overlay]
+    env = dict(base_env)
+    PKG_CONFIG_PATH = env.get('PKG_CONFIG_PATH', '').split(os.pathsep) + pkg_config_path
+    PKG_CONFIG_PATH = list(dict.fromkeys(PKG_CONFIG_PATH))  # Remove duplicated entried
+    env['PKG_CONFIG_PATH'] = os.pathsep.join(PKG_CONFIG_PATH)
+    return env
+
+
+def run_pkgconf(*args: str, cache: bool | None = None, **subprocess_kwargs: Any) -> subprocess.CompletedProcess[bytes | str]:
     """Run the pkgconf executable.
 
     :param args: Arguments to pass to the pkgconf call.
+    :param cache: Whether to use the query result cache. By default, it is used
+        when the output is captured (``capture_output=True``), unless the
+        PKGCONF_PYPI_NO_CACHE environment variable is set, or the ``--no-cache``
+        argument is given. Captured queries are also handled by the in-process
+        engine, if enabled via ``PKGCONF_PYPI_ENGINE=python``.
     :param subprocess_kwargs: Keyword arguments to pass to the subprocess.run call.
+        If ``env`` is given, it is used instead of os.environ as the base
+        environment.
     """
-    env = os.environ.copy()
-    PKG_CONFIG_PATH = env.get('PKG_CONFIG_PATH', '').split(os.pathsep) + get_pkg_config_path()
-    PKG_CONFIG_PATH = list(dict.fromkeys(PKG_CONFIG_PATH))  # Remove duplicated entried
-    env['PKG_CONFIG_PATH'] = os.pathsep.join(PKG_CONFIG_PATH)
+    import subprocess
+
+    cmd, env = _pkgconf_command(args, subprocess_kwargs.pop('env', None))
+    if subprocess_kwargs.get('capture_output') and subprocess_kwargs.keys() <= _CAPTURED_RUN_KWARGS:
+        return _run_captured(cmd, env, _use_query_cache(args, cache), **subprocess_kwargs)
+    with pkgconf._trace.process_span(cmd):
+        return subprocess.run(cmd, env=env, **subprocess_kwargs)
+
+
+def _pkgconf_command(args: Sequence[str], base_env: Mapping[str, str] | None = None) -> tuple[list[str], dict[str, str]]:
+    """Get the command and environment to run pkgconf with ``args``.
+
+    :param base_env: Base environment, defaults to os.environ.
+    """
+    import shlex
+
+    env = _pkgconf_env(os.environ if base_env is None else base_env, get_pkg_config_path())
     cmd = [os.fspath(get_executable()), *args]
-    _CLI_LOGGER.info('Running the Python pkgconf')
-    _CLI_LOGGER.info('$ ' + shlex.join(('PKG_CONFIG_PATH=' + shlex.quote(env['PKG_CONFIG_PATH']), *cmd)))
-    return subprocess.run(cmd, env=env, **subprocess_kwargs)
+    pkgconf._CLI_LOGGER.info('Running the Python pkgconf')
+    pkgconf._CLI_LOGGER.info('$ ' + shlex.join(('PKG_CONFIG_PATH=' + shlex.quote(env['PKG_CONFIG_PATH']), *cmd)))
+    return cmd, env
+
+
+# subprocess.run arguments supported by _run_captured
+_CAPTURED_RUN_KWARGS = frozenset({'capture_output', 'text', 'check', 'cwd'})
+
+
+def _use_query_cache(args: tuple[str, ...], cache: bool | None) -> bool:
+    if cache is None:
+        cache = pkgconf._cache.enabled()
+    return cache and pkgconf._cache.is_cacheable_query(args)
+
+
+def _run_in_process(args: list[str], env: dict[str, str]) -> tuple[int, bytes, bytes] | None:
+    try:
+        returncode, stdout, stderr = pkgconf._pc.run(args, env)
+    except (pkgconf._pc.Unsupported, OSError, ValueError) as e:
+        pkgconf._CLI_LOGGER.info(f'Unable to run the query in-process ({e}), running pkgconf')
+        return None
+    return returncode, os.fsencode(stdout), os.fsencode(stderr)
+
+
+def _decode(data: bytes) -> str:
+    import locale
+
+    # Same as subprocess.run(..., text=True)
+    return data.decode(locale.getpreferredencoding(False)).replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _lookup_result(
+    cmd: list[str], env: dict[str, str], cwd: str, cache: bool
+) -> tuple[tuple[int, bytes, bytes] | None, Callable[[tuple[int, bytes, bytes]], None]]:
+    """Try to get a query result without running pkgconf.
+
+    The query is handled by the in-process engine, if enabled and supported, or
+    by the query result cache, if enabled and the executable, and the .pc files
+    in its search path, are unchanged.
+
+    Returns the result, if found, and a callable that should be called with the
+    result of running pkgconf otherwise.
+    """
+    import functools
+
+    # The in-process engine resolves relative paths from the current directory
+    if pkgconf._pc.enabled(env) and cwd == os.getcwd():
+        if (result := _run_in_process(cmd[1:], env)) is not None:
+            return result, lambda result: None
+    if not cache:
+        return None, lambda result: None
+    key = pkgconf._cache.query_key(cmd, env, cwd)
+    if (signature := pkgconf._cache.query_signature(cmd[0], env)) is None:
+        pkgconf._CLI_LOGGER.info('Unable to get the pkgconf search path, not using the cache')
+        return None, lambda result: None
+    if (result := pkgconf._cache.load_query(key, signature)) is not None:
+        pkgconf._CLI_LOGGER.info('Using cached result')
+    return result, functools.partial(pkgconf._cache.store_query, key, signature)
+
+
+def _run_captured(
+    cmd: list[str],
+    env: dict[str, str],
+    cache: bool,
+    *,
+    capture_output: bool = True,
+    text: bool = False,
+    check: bool = False,
+    cwd: str | os.PathLike[str] | None = None,
+) -> subprocess.CompletedProcess[bytes | str]:
+    """Same as subprocess.run(..., capture_output=True), but avoiding running pkgconf where possible (see _lookup_result)."""
+    import subprocess
+
+    cwd = os.fspath(cwd) if cwd is not None else os.getcwd()
+    result, store = _lookup_result(cmd, env, cwd, cache)
+    if result is None:
+        with pkgconf._trace.process_span(cmd):
+            process = subprocess.run(cmd, env=env, cwd=cwd, capture_output=True, check=False)
+        result = process.returncode, process.stdout, process.stderr
+        store(result)
+
+    returncode, stdout, stderr = result
+    output: tuple[bytes | str, bytes | str] = (_decode(stdout), _decode(stderr)) if text else (stdout, stderr)
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, *output)
+    return subprocess.CompletedProcess(cmd, returncode, *output)
+
+
+class QueryResult:
+    """Result of a pkgconf query."""
+
+    def __init__(self, args: tuple[str, ...], returncode: int, stdout: str, stderr: str) -> None:
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(args={self.args!r}, returncode={self.returncode!r})'
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    @property
+    def flags(self) -> list[str]:
+        """The output, split into a list of flags."""
+        import shlex
+
+        return shlex.split(self.stdout)
+
+    def check(self) -> QueryResult:
+        """Raise subprocess.CalledProcessError if the query failed."""
+        import subprocess
+
+        if not self.ok:
+            raise subprocess.CalledProcessError(self.returncode, ['pkgconf', *self.args], self.stdout, self.stderr)
+        return self
+
+
+class Session:
+    """Run pkgconf queries, calculating the executable, search path and environment only once.
+
+    Query results are memoized for the lifetime of the session. Call
+    :meth:`refresh` to recalculate the environment, and discard them.
+
+    :param env: Base environment, defaults to os.environ.
+    :param cache: Whether to use the query result cache (see :func:`run_pkgconf`).
+    """
+
+    def __init__(self, env: Mapping[str, str] | None = None, cache: bool | None = None) -> None:
+        self._base_env = dict(os.environ if env is None else env)
+        self._cache = cache
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Recalculate the executable, search path and environment, and discard the memoized results."""
+        self.executable = get_executable()
+        self.pkg_config_path = get_pkg_config_path()
+        self.env = _pkgconf_env(self._base_env, self.pkg_config_path)
+        self._results: dict[tuple[str, ...], QueryResult] = {}
+
+    def query(self, *args: str) -> QueryResult:
+        """Run a pkgconf query, with the given arguments.
+
+        This method is thread-safe.
+        """
+        if (result := self._results.get(args)) is None:
+            cmd = [os.fspath(self.executable), *args]
+            process = _run_captured(cmd, self.env, _use_query_cache(args, self._cache), text=True)
+            assert isinstance(process.stdout, str) and isinstance(process.stderr, str)
+            result = self._results[args] = QueryResult(args, process.returncode, process.stdout, process.stderr)
+        return result
+
+    async def aquery(self, *args: str) -> QueryResult:
+        """Same as :meth:`query`, but running pkgconf via asyncio.create_subprocess_exec."""
+        import asyncio
+
+        if (result := self._results.get(args)) is None:
+            cmd = [os.fspath(self.executable), *args]
+            output, store = _lookup_result(cmd, self.env, os.getcwd(), _use_query_cache(args, self._cache))
+            if output is None:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    env=self.env,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await process.communicate()
+                assert process.returncode is not None
+                output = process.returncode, stdout, stderr
+                store(output)
+            returncode, stdout, stderr = output
+            result = self._results[args] = QueryResult(args, returncode, _decode(stdout), _decode(stderr))
+        return result
+
+    def exists(self, *packages: str) -> bool:
+        return self.query('--exists', *packages).ok
+
+    def modversion(self, package: str) -> str:
+        return self.query('--modversion', package).check().stdout.strip()
+
+    def variable(self, package: str, name: str) -> str:
+        return self.query(f'--variable={name}', package).check().stdout.strip()
+
+    def cflags(self, *packages: str, static: bool = False) -> list[str]:
+        return self.query('--cflags', *(['--static'] if static else []), *packages).check().flags
+
+    def libs(self, *packages: str, static: bool = False) -> list[str]:
+        return self.query('--libs', *(['--static'] if static else []), *packages).check().flags
+
+
+def run_many(
+    queries: Iterable[Sequence[str]],
+    max_workers: int | None = None,
+    session: Session | None = None,
+) -> list[QueryResult]:
+    """Run several pkgconf queries concurrently, using a thread pool.
+
+    :param queries: Arguments for each query.
+    :param max_workers: Maximum number of concurrent queries (see
+        concurrent.futures.ThreadPoolExecutor).
+    :param session: Session to run the queries in. By default, a new session is
+        created, so the environment is calculated once, before any query runs.
+    :returns: The query results, in the same order as ``queries``.
+    """
+    import concurrent.futures
+
+    if session is None:
+        session = Session()
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(lambda args: session.query(*args), queries))
+
+
+async def arun_pkgconf(*args: str, session: Session | None = None) -> QueryResult:
+    """Run a pkgconf query asynchronously.
+
+    To run several queries with the same environment, pass the same session to
+    each call. Otherwise, a new session is created, in a worker thread.
+
+    :param args: Arguments to pass to the pkgconf call.
+    :param session: Session to run the query in.
+    """
+    import asyncio
+
+    if session is None:
+        session = await asyncio.to_thread(Session)
+    return await session.aquery(*args)
 
 
 __all__ = [
     'PathWarning',
+    'QueryResult',
+    'Session',
+    'arun_pkgconf',
     'get_executable',
     'get_pkg_config_path',
+    'run_many',
     'run_pkgconf',
 ]
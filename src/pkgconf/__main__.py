@@ -1,57 +1,278 @@
-import logging
+# Like the pkgconf module, this only imports what every entrypoint needs, so
+# that they start fast, and the rest is imported when first used.
+from __future__ import annotations
+
 import os
-import shlex
-import subprocess
 import sys
-import sysconfig
 import warnings
 
-from typing import TextIO
-
 import pkgconf
 
 
-_LOGGER = logging.getLogger(__name__)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from typing import Any, NoReturn, TextIO
 
 
-def main() -> None:
+def main(extra_pkg_config_path: list[str] | None = None) -> None:
+    """Run pkgconf with the arguments from sys.argv, and exit.
+
+    :param extra_pkg_config_path: Search path entries to add before the ones
+        from the current environment (eg. from a stacked virtual environment).
+    """
     args = sys.argv[1:]
 
+    if args == ['--serve']:
+        try:
+            pkgconf._daemon.serve()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
     # If we find that we are calling ourselves, exit immediately
     if os.environ.get('PKGCONF_PYPI_RECURSIVE') == __file__:
-        _LOGGER.info('Giving up, pkgconf recursion loop detected')
+        pkgconf._CLI_LOGGER.info('Giving up, pkgconf recursion loop detected')
         sys.exit(1)
 
     os.environ['PKGCONF_PYPI_RECURSIVE'] = __file__
+    env = pkgconf._pkgconf_env(os.environ, extra_pkg_config_path) if extra_pkg_config_path else None
+
+    if args == ['--batch']:
+        sys.exit(_batch(env=env))
+
+    if os.environ.get('PKGCONF_PYPI_SPECULATIVE') and (returncode := _speculative(args, env)) is not None:
+        sys.exit(returncode)
+
+    sys.exit(_run(args, env))
+
+
+def _run(args: list[str], env: dict[str, str] | None) -> int:
+    """Run our pkgconf, falling back to the system pkgconf/pkg-config if it fails, returning the return code."""
+    import subprocess
+
     returncode = 1
+    # Capture the output of simple queries, and replay it, so that they can be
+    # handled by the query result cache, or the in-process engine.
+    capture_output = pkgconf._cache.is_cacheable_query(args) and (pkgconf._cache.enabled() or pkgconf._pc.enabled())
+    # Without a system pkgconf/pkg-config to fallback to, there's nothing left
+    # to do once our pkgconf exits, so we can hand the process over to it.
+    if not capture_output and not pkgconf._get_system_executable():
+        _exec(*pkgconf._pkgconf_command(args, env))
     try:
-        returncode = pkgconf.run_pkgconf(*args, check=True).returncode
+        process = pkgconf.run_pkgconf(*args, check=True, capture_output=capture_output, env=env)
+        _write_output(process.stdout, process.stderr)
+        returncode = process.returncode
     except subprocess.SubprocessError as e:
+        if isinstance(e, subprocess.CalledProcessError):
+            _write_output(e.stdout, e.stderr)
         # If our pkgconf lookup fails, fallback to the system pkgconf/pkg-config.
-        # For simplicity, the previous call will output to stdout/stderr
-        # regardless of its success, since capturing stdout/stderr in order to
-        # replay is tricky. If the fallback path triggers, it will also output
-        # to stdout/stderr, meaning we will have the output of both process
-        # calls. While a bit unexpected, I believe this is the best option for
-        # debugging.
+        # The output of our pkgconf has already been written at this point,
+        # either directly, or replayed above, if it was captured. If the
+        # fallback path triggers, it will also output to stdout/stderr, meaning
+        # we will have the output of both process calls. While a bit
+        # unexpected, I believe this is the best option for debugging.
         system_executable = pkgconf._get_system_executable()
         if system_executable:
+            import shlex
+
             cmd = [os.fspath(system_executable), *args]
-            _LOGGER.info(f'Running the system {system_executable.name}')
-            _LOGGER.info('$ ' + shlex.join(cmd))
-            returncode = subprocess.run(cmd).returncode
+            pkgconf._CLI_LOGGER.info(f'Running the system {system_executable.name}')
+            pkgconf._CLI_LOGGER.info('$ ' + shlex.join(cmd))
+            _exec(cmd)
         elif isinstance(e, subprocess.CalledProcessError):
             returncode = e.returncode
 
-    sys.exit(returncode)
+    return returncode
+
+
+def _speculative(args: list[str], env: dict[str, str] | None) -> int | None:
+    """Run our pkgconf and the system pkgconf/pkg-config at the same time, returning the return code.
+
+    Only the output of the successful one is written, preferring ours, or the
+    output of both, if both fail. If there's no system pkgconf/pkg-config, None
+    is returned.
+    """
+    import shlex
+    import subprocess
+
+    if not (system_executable := pkgconf._get_system_executable()):
+        return None
+    cmd = [os.fspath(system_executable), *args]
+    pkgconf._CLI_LOGGER.info(f'Speculatively running the system {system_executable.name}')
+    pkgconf._CLI_LOGGER.info('$ ' + shlex.join(cmd))
+    system = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        process = pkgconf.run_pkgconf(*args, check=False, capture_output=True, env=env)
+        if process.returncode == 0:
+            _write_output(process.stdout, process.stderr)
+            return 0
+        stdout, stderr = system.communicate()
+    finally:
+        if system.returncode is None:
+            system.kill()
+            system.wait()
+    if system.returncode == 0:
+        pkgconf._CLI_LOGGER.info(f'Discarding the output of the Python pkgconf, which failed: {process.stderr!r}')
+    else:
+        # Like _run(), keep the output of our pkgconf for debugging
+        _write_output(process.stdout, process.stderr)
+    _write_output(stdout, stderr)
+    return system.returncode
+
+
+def _batch_query(session: pkgconf.Session, line: str) -> dict[str, Any]:
+    import json
+    import subprocess
+
+    try:
+        args = json.loads(line)
+    except ValueError as e:
+        return {'error': f'Invalid query: {e}'}
+    if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+        return {'error': 'Invalid query: expected a JSON array of strings'}
+
+    # Errors are reported in the result, so that they don't prevent writing the following ones
+    try:
+        result = session.query(*args)
+        returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+        # Same fallback as main(), but capturing the output
+        if not result.ok and (system_executable := pkgconf._get_system_executable()):
+            process = subprocess.run([os.fspath(system_executable), *args], capture_output=True, text=True, check=False)
+            returncode = process.returncode
+            stdout += process.stdout
+            stderr += process.stderr
+    except Exception as e:
+        return {'args': args, 'error': f'Query failed: {e}'}
+    return {'args': args, 'returncode': returncode, 'stdout': stdout, 'stderr': stderr}
+
+
+def _batch(max_workers: int | None = None, env: dict[str, str] | None = None) -> int:
+    """Run queries read from stdin, one per line, as a JSON array of arguments.
+
+    The result of each query is written to stdout as a JSON object, with the
+    args, returncode, stdout and stderr keys (or error, for invalid or failed
+    queries), in the same order as the queries. Queries run concurrently, and each result is
+    written as soon as it, and the ones before it, are available.
+    """
+    import concurrent.futures
+    import json
+    import queue
+    import threading
 
+    session = pkgconf.Session(env)
+    pending: queue.Queue[concurrent.futures.Future[dict[str, Any]] | None] = queue.Queue()
+
+    def write_results() -> None:
+        while (future := pending.get()) is not None:
+            sys.stdout.write(json.dumps(future.result()) + '\n')
+            sys.stdout.flush()
+
+    writer = threading.Thread(target=write_results)
+    writer.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            for line in sys.stdin:
+                if line.strip():
+                    pending.put(executor.submit(_batch_query, session, line))
+    finally:
+        pending.put(None)
+        writer.join()
+    return 0
+
+
+def _write_output(stdout: bytes | str | None, stderr: bytes | str | None) -> None:
+    for data, stream in ((stdout, sys.stdout), (stderr, sys.stderr)):
+        if not data:
+            continue
+        if isinstance(data, bytes):
+            stream.buffer.write(data)
+        else:
+            stream.write(data)
+        stream.flush()
+
+
+def _exec(cmd: list[str], env: Mapping[str, str] | None = None) -> NoReturn:
+    """Replace the current process with ``cmd``, or, where that's not possible, run it and exit with its return code.
+
+    On POSIX, the process is replaced via os.execve, so that no interpreter is
+    left waiting for pkgconf, and signals and the exit status go straight to
+    our caller. Set PKGCONF_PYPI_NO_EXEC to run ``cmd`` as a child process
+    instead.
+
+    :param env: Environment to run ``cmd`` with, defaults to os.environ.
+    """
+    if os.name == 'posix' and not os.environ.get('PKGCONF_PYPI_NO_EXEC'):
+        # The atexit handlers don't run, and the buffered output is lost, after the exec
+        sys.stdout.flush()
+        sys.stderr.flush()
+        if 'pkgconf._path_entrypoints' in sys.modules:
+            pkgconf._path_entrypoints._cleanup_isolated_contexts()
+        if 'pkgconf._trace' in sys.modules:
+            pkgconf._trace.flush()
+        os.execve(cmd[0], cmd, os.environ if env is None else env)
+
+    import subprocess
+
+    sys.exit(subprocess.run(cmd, env=env).returncode)
+
+
+def _venv_paths(config_vars: dict[str, str]) -> dict[str, str]:
+    import sysconfig
 
-def _venv_paths(config_vars: dict[str, str]) -> str:
     if 'venv' in sysconfig.get_scheme_names():
         return sysconfig.get_paths('venv', vars=config_vars)
     return sysconfig.get_paths(vars=config_vars)
 
 
+def _read_pyvenv_cfg(venv: str) -> dict[str, str]:
+    config = {}
+    with open(os.path.join(venv, 'pyvenv.cfg'), encoding='utf-8') as f:
+        for line in f:
+            key, separator, value = line.partition('=')
+            if separator:
+                config[key.strip().lower()] = value.strip()
+    return config
+
+
+def _stacked_venv_pkg_config_path(venv: str) -> list[str] | None:
+    """Calculate the PKG_CONFIG_PATH entries for a virtual environment stacked on top of the current one.
+
+    The entries only cover the distributions installed in the virtual
+    environment itself, the ones from the current environment are added by
+    main(), after them, matching the precedence they have in the virtual
+    environment's sys.path.
+
+    Returns None if the virtual environment isn't stacked on top of the current
+    environment (--system-site-packages), or if any of its entrypoints can't be
+    resolved without importing them (eg. editable installs), in which case we
+    need to run its interpreter instead.
+    """
+    import sysconfig
+
+    try:
+        config = _read_pyvenv_cfg(venv)
+    except OSError:
+        return None
+    base_executable = getattr(sys, '_base_executable', sys.executable)
+    if (
+        sys.prefix != sys.base_prefix
+        or config.get('include-system-site-packages', '').lower() != 'true'
+        or not config.get('home')
+        or os.path.realpath(config['home']) != os.path.realpath(os.path.dirname(base_executable))
+        or (config.get('version_info') or config.get('version', '')).split('.')[:2]
+        != sysconfig.get_python_version().split('.')
+    ):
+        return None
+
+    venv_vars = sysconfig.get_config_vars().copy()
+    venv_vars['base'] = venv_vars['platbase'] = venv
+    paths = _venv_paths(venv_vars)
+    site_dirs = list(dict.fromkeys([paths['purelib'], paths['platlib']]))
+    eps = pkgconf._path_entrypoints.path_entry_points(site_dirs, group='pkg_config')
+    return None if eps is None else [ep.path for ep in eps]
+
+
 def _vanilla_entrypoint():
     if 'FORCE_PKGCONF_PYPI' in os.environ:
         # For backwards compatibility, and in cases where the user can't specify
@@ -59,7 +280,7 @@ def _vanilla_entrypoint():
         # by setting FORCE_PKGCONF_PYPI.
         _python_aware_entrypoint()
     else:
-        if not (executable := pkgconf._get_executable()):
+        if not (executable := pkgconf._executable_path()):
             print('pkgconf-pypi error: Unable to find bundled pkgconf/pkg-config executable!', file=sys.stderr)
             sys.exit(1)
         if (
@@ -79,25 +300,37 @@ def _vanilla_entrypoint():
                 ),
                 stacklevel=2,
             )
-            sys.exit(subprocess.run([os.fspath(executable), *sys.argv[1:]]).returncode)
+        _exec([executable, *sys.argv[1:]])
 
 
 def _python_aware_entrypoint():
+    import sysconfig
+
+    # If there is a daemon serving the environment, let it handle the query.
+    if (returncode := pkgconf._daemon.forward(sys.argv[1:])) is not None:
+        sys.exit(returncode)
+
     # Since project.script entrypoints use an hardcoded interpreter path from
     # the environment they were installed in, when stacking environments (eg.
     # using venv's --system-site-packages option), the entrypoint will run in
     # the base environment and, as such, it will not have access to the
     # entrypoints from the "child" environment. Because of this, when a virtual
-    # environment is enabled, instead of running main() from this process, we
-    # will run 'python -m pkgconf', so that we have access to the full
-    # environment.
-    if 'VIRTUAL_ENV' in os.environ:
+    # environment is enabled, we look up the entrypoints of its distributions
+    # directly, and if that isn't possible, instead of running main() from this
+    # process, we will run 'python -m pkgconf', so that we have access to the
+    # full environment.
+    venv = os.environ.get('VIRTUAL_ENV')
+    if venv and os.path.realpath(venv) == os.path.realpath(sys.prefix):
+        venv = None  # We are running from the virtual environment itself
+    if venv and (venv_pkg_config_path := _stacked_venv_pkg_config_path(venv)) is not None:
+        _setup_cli()
+        main(venv_pkg_config_path)
+    elif venv:
         venv_vars = sysconfig.get_config_vars().copy()
         venv_vars['base'] = venv_vars['platbase'] = os.environ['VIRTUAL_ENV']
         scripts = _venv_paths(venv_vars)['scripts']
         python_path = os.path.join(scripts, 'python')
-        process = subprocess.run([python_path, '-m', 'pkgconf', *sys.argv[1:]])
-        sys.exit(process.returncode)
+        _exec([python_path, '-m', 'pkgconf', *sys.argv[1:]])
     else:
         _setup_cli()
         main()
@@ -120,6 +353,8 @@ def _use_colors() -> bool:
 
 
 def _setup_cli():
+    import logging
+
     if _use_colors():
         dim = '\33[2m'
         yellow = '\33[93m'
@@ -0,0 +1,283 @@
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import sys
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+
+# Cache location helpers
+
+
+def enabled() -> bool:
+    return not os.environ.get('PKGCONF_PYPI_NO_CACHE')
+
+
+def cache_dir() -> pathlib.Path:
+    """Get the user cache directory for pkgconf-pypi."""
+    if path := os.environ.get('PKGCONF_PYPI_CACHE_DIR'):
+        return pathlib.Path(path)
+
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r'~\AppData\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return pathlib.Path(base, 'pkgconf-pypi')
+
+
+def _interpreter_key() -> str:
+    """Key identifying the current interpreter, used to name the cache files."""
+    return hashlib.sha256(f'{sys.executable}\0{sys.prefix}'.encode()).hexdigest()[:32]
+
+
+def read_json(name: str) -> Any:
+    """Read a JSON cache file, returning None if it is missing or corrupted."""
+    try:
+        with open(cache_dir() / name, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(name: str, data: Any) -> None:
+    """Atomically write a JSON cache file, ignoring any errors."""
+    # Only needed on cache misses, so not imported by the pkgconf-pypi fast path
+    import tempfile
+
+    path = cache_dir() / name
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass
+
+
+# Environment fingerprint
+
+
+_METADATA_SUFFIXES = ('.dist-info', '.egg-info')
+
+
+def environment_fingerprint(strategy: str | None = None) -> str:
+    """Calculate a cheap fingerprint of the installed distributions.
+
+    It covers the interpreter, the entrypoint path resolution strategy, the
+    sys.path entries, and the name and mtime of every distribution metadata
+    directory found in them, so that installing or removing a distribution
+    changes the fingerprint. No modules are imported.
+
+    :param strategy: Entrypoint path resolution strategy (see
+        :func:`pkgconf.get_pkg_config_path`).
+    """
+    # Same default as pkgconf._path_entrypoints.resolution_strategy, which isn't imported on the fast path
+    strategy = strategy or os.environ.get('PKGCONF_PYPI_RESOLUTION_STRATEGY') or 'import-system'
+    h = hashlib.sha256()
+    h.update(f'{sys.executable}\0{sys.version}\0{strategy}\0'.encode())
+    for entry in sys.path:
+        h.update(f'path:{entry}\0'.encode())
+        try:
+            with os.scandir(entry or '.') as it:
+                found = sorted((item.name, item.stat().st_mtime_ns) for item in it if item.name.endswith(_METADATA_SUFFIXES))
+        except OSError:
+            continue
+        for name, mtime in found:
+            h.update(f'{name}:{mtime}\0'.encode())
+    return h.hexdigest()
+
+
+def pc_files_signature(dirs: Iterable[str]) -> str:
+    """Calculate a fingerprint of the .pc files (name and mtime) in the given directories."""
+    h = hashlib.sha256()
+    for directory in dirs:
+        h.update(f'dir:{directory}\0'.encode())
+        try:
+            with os.scandir(directory) as it:
+                found = sorted((item.name, item.stat().st_mtime_ns) for item in it if item.name.endswith('.pc'))
+        except OSError:
+            continue
+        for name, mtime in found:
+            h.update(f'{name}:{mtime}\0'.encode())
+    return h.hexdigest()
+
+
+# Environment variables, other than PKG_CONFIG_* and PKGCONF_*, that affect pkgconf queries
+_QUERY_ENV_VARS = frozenset({'C_INCLUDE_PATH', 'CPLUS_INCLUDE_PATH', 'LIBRARY_PATH', 'INCLUDE', 'LIB'})
+
+
+def query_env(env: Mapping[str, str]) -> dict[str, str]:
+    """Select the environment variables that affect the result of pkgconf queries."""
+    return {
+        key: value
+        for key, value in sorted(env.items())
+        if key.startswith(('PKG_CONFIG_', 'PKGCONF_')) or key in _QUERY_ENV_VARS
+    }
+
+
+def search_dirs(env: Mapping[str, str]) -> list[str]:
+    """Get the directories pkgconf searches for .pc files, given its environment.
+
+    This doesn't include the built-in directories, used when PKG_CONFIG_LIBDIR
+    isn't set (see :func:`default_search_dirs`).
+    """
+    dirs = []
+    for var in ('PKG_CONFIG_PATH', 'PKG_CONFIG_LIBDIR'):
+        dirs += [directory for directory in env.get(var, '').split(os.pathsep) if directory]
+    return dirs
+
+
+def _executable_id(executable: str) -> str | None:
+    try:
+        st = os.stat(executable)
+    except OSError:
+        return None
+    return f'{os.path.abspath(executable)}:{st.st_size}:{st.st_mtime_ns}'
+
+
+# Built-in search directories, by executable ID
+_default_search_dirs: dict[str, list[str] | None] = {}
+
+
+def default_search_dirs(executable: str) -> list[str] | None:
+    """Get the built-in search directories of a pkgconf/pkg-config executable, or None if unknown.
+
+    Since getting them requires running the executable, they are cached, keyed
+    by its path, size and mtime.
+    """
+    if not (executable_id := _executable_id(executable)):
+        return None
+    if executable_id in _default_search_dirs:
+        return _default_search_dirs[executable_id]
+
+    name = os.path.join('default-search-dirs', f'{hashlib.sha256(executable_id.encode()).hexdigest()[:32]}.json')
+    data = read_json(name)
+    if isinstance(data, dict) and data.get('executable') == executable_id and isinstance(data.get('dirs'), list):
+        dirs: list[str] | None = data['dirs']
+    else:
+        # Only needed on cache misses, so not imported by the pkgconf-pypi fast path
+        import subprocess
+
+        # The pc_path variable of the pkg-config virtual package holds the built-in search path
+        env = {key: value for key, value in os.environ.items() if not key.startswith(('PKG_CONFIG_', 'PKGCONF_'))}
+        try:
+            process = subprocess.run(
+                [executable, '--variable=pc_path', 'pkg-config'], env=env, capture_output=True, text=True, check=True
+            )
+        except (OSError, subprocess.SubprocessError):
+            dirs = None
+        else:
+            dirs = [directory for directory in process.stdout.strip().split(os.pathsep) if directory]
+            write_json(name, {'executable': executable_id, 'dirs': dirs})
+    _default_search_dirs[executable_id] = dirs
+    return dirs
+
+
+def query_signature(executable: str, env: Mapping[str, str]) -> str | None:
+    """Calculate the signature of the .pc files a pkgconf query can use, or None if they can't be determined.
+
+    It covers the executable, and the .pc files in its search path, including
+    the built-in directories, unless PKG_CONFIG_LIBDIR is set.
+    """
+    if not (executable_id := _executable_id(executable)):
+        return None
+    dirs = search_dirs(env)
+    if 'PKG_CONFIG_LIBDIR' not in env:
+        if (default_dirs := default_search_dirs(executable)) is None:
+            return None
+        dirs += default_dirs
+    return hashlib.sha256(f'{executable_id}\0{pc_files_signature(dirs)}'.encode()).hexdigest()
+
+
+def is_cacheable_query(args: Iterable[str]) -> bool:
+    """Check if the result of a pkgconf query only depends on the .pc files in the search path."""
+    return not any(arg == '--no-cache' or arg.startswith('--with-path') or arg.endswith('.pc') for arg in args)
+
+
+# PKG_CONFIG_PATH cache
+
+
+def _pkg_config_path_file() -> str:
+    return os.path.join('pkg-config-path', f'{_interpreter_key()}.json')
+
+
+def load_pkg_config_path(fingerprint: str) -> list[str] | None:
+    """Load the cached PKG_CONFIG_PATH, if it matches the environment fingerprint."""
+    data = read_json(_pkg_config_path_file())
+    if not isinstance(data, dict) or data.get('fingerprint') != fingerprint:
+        return None
+    path = data.get('path')
+    if not isinstance(path, list) or not all(isinstance(entry, str) for entry in path):
+        return None
+    return path
+
+
+def store_pkg_config_path(fingerprint: str, path: list[str]) -> None:
+    """Store PKG_CONFIG_PATH in the cache."""
+    write_json(_pkg_config_path_file(), {'fingerprint': fingerprint, 'path': path})
+
+
+# pkgconf query result cache
+
+
+def _query_cache_size() -> int:
+    try:
+        return int(os.environ.get('PKGCONF_PYPI_QUERY_CACHE_SIZE') or 1024)
+    except ValueError:
+        return 1024
+
+
+def query_key(cmd: list[str], env: Mapping[str, str], cwd: str) -> str:
+    """Calculate the cache key for a pkgconf query."""
+    return hashlib.sha256(json.dumps([cmd, cwd, query_env(env)]).encode()).hexdigest()
+
+
+def load_query(key: str, signature: str) -> tuple[int, bytes, bytes] | None:
+    """Load a cached query result (return code, stdout and stderr), if the .pc files signature matches."""
+    name = os.path.join('queries', f'{key}.json')
+    data = read_json(name)
+    if not isinstance(data, dict) or data.get('signature') != signature:
+        return None
+    try:
+        result = data['returncode'], base64.b64decode(data['stdout']), base64.b64decode(data['stderr'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    # Mark as recently used, for the LRU eviction
+    with contextlib.suppress(OSError):
+        os.utime(cache_dir() / name)
+    return result
+
+
+def store_query(key: str, signature: str, result: tuple[int, bytes, bytes]) -> None:
+    """Store a query result in the cache, evicting the least recently used entries if it is full."""
+    returncode, stdout, stderr = result
+    write_json(
+        os.path.join('queries', f'{key}.json'),
+        {
+            'signature': signature,
+            'returncode': returncode,
+            'stdout': base64.b64encode(stdout).decode(),
+            'stderr': base64.b64encode(stderr).decode(),
+        },
+    )
+
+    try:
+        with os.scandir(cache_dir() / 'queries') as it:
+            entries = [(entry.stat().st_mtime_ns, entry.path) for entry in it if entry.name.endswith('.json')]
+    except OSError:
+        return
+    excess = len(entries) - _query_cache_size()
+    for _, path in sorted(entries)[: max(excess, 0)]:
+        with contextlib.suppress(OSError):
+            os.unlink(path)
@@ -0,0 +1,252 @@
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import stat
+import sys
+
+from collections.abc import Mapping
+
+import pkgconf
+import pkgconf._cache
+
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import socketserver
+
+
+_LOGGER = pkgconf._LOGGER.getChild('daemon')
+
+_MAX_RESULTS = 4096
+
+# Maximum time, in seconds, to wait for the daemon to accept a query, and for
+# each read of its response, after which the query is run locally
+_CLIENT_TIMEOUT = 10
+
+# Environment variables forwarded to the daemon, on top of the ones in pkgconf._cache.query_env,
+# PATH being needed to find the system pkgconf/pkg-config
+_FORWARDED_ENV_VARS = ('PATH',)
+
+
+def enabled() -> bool:
+    return hasattr(socket, 'AF_UNIX') and not os.environ.get('PKGCONF_PYPI_NO_DAEMON')
+
+
+def socket_path(prefix: str | None = None) -> str:
+    """Get the daemon socket path for the Python environment at ``prefix``.
+
+    The prefix defaults to the active virtual environment, if any, otherwise the
+    current environment.
+    """
+    if prefix is None:
+        prefix = os.environ.get('VIRTUAL_ENV') or sys.prefix
+    key = hashlib.sha256(os.path.realpath(prefix).encode()).hexdigest()[:16]
+    path = os.path.join(pkgconf._cache.cache_dir(), 'daemon', f'{key}.sock')
+    # AF_UNIX paths are limited to ~100 bytes
+    if len(os.fsencode(path)) > 100:
+        import tempfile
+
+        user = os.getuid() if hasattr(os, 'getuid') else 'user'
+        path = os.path.join(tempfile.gettempdir(), f'pkgconf-pypi-{user}', f'{key}.sock')
+    return path
+
+
+def _is_private_dir(path: str) -> bool:
+    """Check that ``path`` is a directory owned by the current user, and only accessible by them."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+# Client
+
+
+def _request_env() -> dict[str, str]:
+    """Select the environment variables the daemon needs to run the query, leaving out anything else (eg. secrets)."""
+    env = pkgconf._cache.query_env(os.environ)
+    env.update((key, os.environ[key]) for key in _FORWARDED_ENV_VARS if key in os.environ)
+    return env
+
+
+def forward(args: list[str]) -> int | None:
+    """Forward a pkgconf call to the daemon serving the current environment.
+
+    The daemon output is written to stdout/stderr, and its return code is
+    returned. If no daemon is available, None is returned.
+    """
+    if not enabled() or args in (['--serve'], ['--batch']) or os.environ.get('PKGCONF_PYPI_RECURSIVE'):
+        return None
+
+    path = socket_path()
+    # Another user could be listening on the socket path, if they created its directory
+    if not _is_private_dir(os.path.dirname(path)):
+        _LOGGER.info(f'Not forwarding to the daemon, {os.path.dirname(path)} is not private to the current user')
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(_CLIENT_TIMEOUT)
+    with sock:
+        try:
+            sock.connect(path)
+            request = {'args': args, 'cwd': os.getcwd(), 'env': _request_env()}
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            with sock.makefile('rb') as f:
+                header = json.loads(f.readline() or 'null')
+                if not isinstance(header, dict) or 'returncode' not in header:
+                    return None
+                stdout = f.read(header['stdout'])
+                stderr = f.read(header['stderr'])
+        except (OSError, ValueError) as e:
+            # Includes TimeoutError, if the daemon is unresponsive
+            _LOGGER.info(f'Failed to forward the query to the daemon ({e}), running it locally')
+            return None
+
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.flush()
+    return int(header['returncode'])
+
+
+# Server
+
+
+class Daemon:
+    """Query state kept by the daemon, shared between connections."""
+
+    def __init__(self) -> None:
+        import threading
+
+        self._lock = threading.Lock()
+        self._fingerprint: str | None = None
+        self._pkg_config_path: list[str] = []
+        self._results: dict[str, tuple[str, tuple[int, bytes, bytes]]] = {}
+
+    def pkg_config_path(self) -> list[str]:
+        """Get the PKG_CONFIG_PATH for the environment, recalculating it only if the environment changed."""
+        fingerprint = pkgconf._cache.environment_fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._pkg_config_path = pkgconf.get_pkg_config_path()
+                self._fingerprint = fingerprint
+            return self._pkg_config_path
+
+    def query(self, args: list[str], env: Mapping[str, str], cwd: str) -> tuple[int, bytes, bytes]:
+        """Run a pkgconf query, returning the return code, stdout and stderr.
+
+        Results are kept in memory, and reused as long as the executable, and
+        the .pc files in its search path, don't change.
+        """
+        pkgconf_env = pkgconf._pkgconf_env(env, self.pkg_config_path())
+        signature = None
+        if pkgconf._cache.is_cacheable_query(args):
+            signature = pkgconf._cache.query_signature(os.fspath(pkgconf.get_executable()), pkgconf_env)
+        if signature is None:
+            return self._run(args, pkgconf_env, cwd)[0]
+
+        key = json.dumps([args, cwd, pkgconf._cache.query_env(pkgconf_env)])
+        with self._lock:
+            cached = self._results.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        result, from_system = self._run(args, pkgconf_env, cwd)
+        # Results from the system pkgconf depend on files outside the search path
+        if not from_system:
+            with self._lock:
+                self._results.pop(key, None)
+                self._results[key] = signature, result
+                while len(self._results) > _MAX_RESULTS:
+                    del self._results[next(iter(self._results))]
+        return result
+
+    def _run(self, args: list[str], env: dict[str, str], cwd: str) -> tuple[tuple[int, bytes, bytes], bool]:
+        # Same as pkgconf.__main__.main, but capturing the output
+        import subprocess
+
+        import pkgconf.__main__
+
+        env['PKGCONF_PYPI_RECURSIVE'] = pkgconf.__main__.__file__
+        cmd = [os.fspath(pkgconf.get_executable()), *args]
+        process = subprocess.run(cmd, env=env, cwd=cwd, capture_output=True, check=False)
+        if process.returncode == 0:
+            return (0, process.stdout, process.stderr), False
+
+        system_executable = pkgconf._get_system_executable(env)
+        if not system_executable:
+            return (process.returncode, process.stdout, process.stderr), False
+        fallback = subprocess.run([os.fspath(system_executable), *args], env=env, cwd=cwd, capture_output=True, check=False)
+        stdout, stderr = process.stdout + fallback.stdout, process.stderr + fallback.stderr
+        return (fallback.returncode, stdout, stderr), True
+
+
+def _server(path: str) -> 'socketserver.ThreadingUnixStreamServer':
+    """Create the daemon server, listening on ``path``.
+
+    socketserver is only imported here, so that it isn't imported by the client.
+    """
+    import socketserver
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline())
+                returncode, stdout, stderr = server_state.query(request['args'], request['env'], request['cwd'])
+            except Exception as e:
+                # The client falls back to running the query itself
+                _LOGGER.exception('Failed to handle request')
+                self.wfile.write(json.dumps({'error': str(e)}).encode() + b'\n')
+                return
+            header = {'returncode': returncode, 'stdout': len(stdout), 'stderr': len(stderr)}
+            # In a single write, since the client may close the connection as soon as it got everything
+            self.wfile.write(json.dumps(header).encode() + b'\n' + stdout + stderr)
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    server_state = Daemon()
+    return Server(path, RequestHandler)
+
+
+def _is_listening(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(path: str | None = None) -> None:
+    """Serve pkgconf queries for the current environment, until interrupted.
+
+    :param path: Socket path, defaults to :func:`socket_path` for the current environment.
+    """
+    if path is None:
+        path = socket_path(sys.prefix)
+    if _is_listening(path):
+        msg = f'A pkgconf-pypi daemon is already listening on {path}'
+        raise RuntimeError(msg)
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # The mode is not applied if the directory already existed
+    if os.stat(directory).st_uid != os.getuid():
+        msg = f'The daemon socket directory ({directory}) is owned by another user'
+        raise RuntimeError(msg)
+    os.chmod(directory, 0o700)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    with _server(path) as server:
+        os.chmod(path, 0o600)
+        _LOGGER.info(f'Listening on {path}')
+        try:
+            server.serve_forever()
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
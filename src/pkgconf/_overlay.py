@@ -0,0 +1,92 @@
+"""Consolidated .pc overlay directory.
+
+Instead of adding one directory per entrypoint to PKG_CONFIG_PATH, all of which
+pkgconf searches for every package it looks up, the .pc files from all of them
+can be placed in a single overlay directory.
+
+pkgconf doesn't resolve symlinks when setting the pcfiledir variable, so the
+overlay contains copies of the .pc files, with pcfiledir defined as their
+original directory, which keeps relocatable .pc files working.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from collections.abc import Mapping
+
+import pkgconf._cache
+
+
+# Characters that would need escaping in the pcfiledir definition
+_UNSAFE_CHARS = frozenset(' \t\r\n$#\\"\'')
+# Overlays older than this, other than the current one, are removed
+_MAX_STALE_AGE = 60
+
+
+def enabled(env: Mapping[str, str] = os.environ) -> bool:
+    # pkgconf relocates the prefix variable based on the .pc file location by default on Windows (--define-prefix)
+    return bool(env.get('PKGCONF_PYPI_OVERLAY')) and os.name == 'posix'
+
+
+def _populate(overlay: str, dirs: list[str]) -> None:
+    for directory in dirs:
+        try:
+            with os.scandir(directory) as it:
+                names = sorted(item.name for item in it if item.name.endswith('.pc') and item.is_file())
+        except OSError:
+            continue
+        for name in names:
+            target = os.path.join(overlay, name)
+            # Like pkgconf, the first directory in the search path wins
+            if os.path.exists(target):
+                continue
+            with open(os.path.join(directory, name), 'rb') as f:
+                data = f.read()
+            with open(target, 'wb') as f:
+                f.write(f'pcfiledir={directory}\n'.encode() + data)
+
+
+def _remove_stale(base: str, current: str) -> None:
+    now = time.time()
+    try:
+        with os.scandir(base) as it:
+            stale = [item.path for item in it if item.name != current and now - item.stat().st_mtime > _MAX_STALE_AGE]
+    except OSError:
+        return
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def overlay_dir(dirs: list[str]) -> str | None:
+    """Get the overlay directory with the .pc files from ``dirs``, building it if needed.
+
+    The overlay is keyed by the directories, and the name and mtime of their .pc
+    files, so it is only rebuilt when they change. Returns None if the overlay
+    can't be used.
+    """
+    if any(_UNSAFE_CHARS.intersection(directory) for directory in dirs):
+        return None
+
+    base = os.path.join(pkgconf._cache.cache_dir(), 'overlay', pkgconf._cache._interpreter_key())
+    name = pkgconf._cache.pc_files_signature(dirs)[:32]
+    path = os.path.join(base, name)
+    if os.path.isdir(path):
+        return path
+
+    try:
+        os.makedirs(base, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=base, prefix='.tmp-')
+    except OSError:
+        return None
+    try:
+        _populate(tmp, dirs)
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # Another process might have built it meanwhile
+        if not os.path.isdir(path):
+            return None
+    _remove_stale(base, name)
+    return path
@@ -1,21 +1,31 @@
 import atexit
+import concurrent.futures
 import contextlib
+import functools
 import importlib.machinery
 import importlib.metadata
 import importlib.resources
 import importlib.util
+import itertools
+import json
 import operator
 import os
 import pathlib
 import pickle
+import re
+import subprocess
 import sys
+import threading
+import time
 import types
 import warnings
 
 from collections.abc import Callable, Iterable
-from typing import Any, ParamSpec, TypeVar
+from typing import Any, ParamSpec, TypeVar, cast
 
 import pkgconf
+import pkgconf._cache
+import pkgconf._trace
 
 
 P = ParamSpec('P')
@@ -65,9 +75,29 @@ def module_path(name: str) -> str:
     raise ValueError(msg)
 
 
+def module_paths(names: list[str]) -> list[tuple[bool, str]]:
+    """Resolve several module names to file-system paths.
+
+    Returns a (success, value) tuple for each name, where value is either the
+    path, or the error message. Errors are returned as strings, since exception
+    types defined by the resolved packages might not be importable by the
+    caller.
+
+    WARNING: This places uninitialized modules in sys.modules.
+    """
+    results = []
+    for name in names:
+        try:
+            results.append((True, module_path(name)))
+        except Exception as e:
+            results.append((False, f'{e.__class__.__name__}: {e}'))
+    return results
+
+
 # Helpers to run the import helpers isolated from the import state of the main process/interpreter
 
 _subinterpreter = None
+_subinterpreter_lock = threading.Lock()
 
 
 def run_in_subinterpreter(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
@@ -78,106 +108,368 @@ def run_in_subinterpreter(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs)
 
     global _subinterpreter
 
-    if _subinterpreter is None:
-        _subinterpreter = concurrent.interpreters.create()
+    with _subinterpreter_lock:
+        if _subinterpreter is None:
+            with pkgconf._trace.span('subinterpreter start-up', 'isolated-context'):
+                _subinterpreter = concurrent.interpreters.create()
+        interpreter = _subinterpreter
+
+    with pkgconf._trace.span('subinterpreter call', 'isolated-context', function=fn.__name__):
+        try:
+            return _call_with_deadline(interpreter.call, fn, *args, **kwargs)
+        except TimeoutError:
+            # Subinterpreter calls can't be interrupted, so abandon it, and
+            # create a new one in the next call
+            with _subinterpreter_lock:
+                if _subinterpreter is interpreter:
+                    _subinterpreter = None
+            raise
+
+
+def _call_with_deadline(call: Callable[..., T], fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``call(fn, *args, **kwargs)`` in a thread, raising TimeoutError if it takes longer than :func:`worker_timeout`.
 
-    return _subinterpreter.call(fn, *args, **kwargs)
+    This is for isolated contexts that can't be killed (subinterpreters), so on
+    timeout, the thread is left running in the background.
+    """
+    if (timeout := worker_timeout()) is None:
+        return call(fn, *args, **kwargs)
 
+    future: concurrent.futures.Future[T] = concurrent.futures.Future()
+
+    def target() -> None:
+        try:
+            future.set_result(call(fn, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
 
-_worker = None
-_worker_process = None
+    threading.Thread(target=target, daemon=True).start()
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        if future.done():
+            raise
+        pkgconf._LOGGER.warning(f'Abandoning the isolated context, {fn.__name__} took longer than {timeout}s')
+        msg = f'{fn.__name__} took longer than {timeout}s in the isolated context'
+        raise TimeoutError(msg) from None
+
+
+# The worker runs in isolated mode, without the site module, for a faster
+# startup, so it gets the sys.path, and the site directories whose .pth files
+# need to be processed (eg. for the import hooks of editable installs), from
+# the parent.
 _WORKER_CODE = r"""
 import sys, pickle
 
+sys.path[:], site_dirs = pickle.loads(bytes.fromhex(sys.argv[1]))
+if site_dirs:
+    import site
+    for site_dir in site_dirs:
+        site.addsitedir(site_dir)
+
 stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
 
 while True:
+    header = stdin.read(12)
+    if len(header) < 12:
+        break
+    request_id, length = int.from_bytes(header[:8], "big"), int.from_bytes(header[8:], "big")
+    payload = stdin.read(length)
     try:
-        length_data = stdin.read(4)
-        if not length_data:
-            break
-        length = int.from_bytes(length_data, "big")
-        payload = stdin.read(length)
         fn, args, kwargs = pickle.loads(payload)
+        data = pickle.dumps((True, fn(*args, **kwargs)))
+    except Exception as e:
         try:
-            result = fn(*args, **kwargs)
-            data = pickle.dumps((True, result))
-        except Exception as e:
             data = pickle.dumps((False, e))
-        stdout.write(len(data).to_bytes(4, "big"))
-        stdout.write(data)
-        stdout.flush()
-    except Exception:
-        break
+        except Exception:
+            data = pickle.dumps((False, RuntimeError(f"{e.__class__.__name__}: {e}")))
+    stdout.write(request_id.to_bytes(8, "big") + len(data).to_bytes(4, "big") + data)
+    stdout.flush()
 """
 
 
-def _make_worker():
-    """Start worker subprocess and assign callable to _worker."""
-    global _worker, _worker_process
-    import subprocess
+def worker_timeout() -> float | None:
+    """Get the maximum time, in seconds, a call to an isolated context can take.
 
-    proc = subprocess.Popen(
-        [sys.executable, '-u', '-c', _WORKER_CODE],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-    )
-    _worker_process = proc
+    It defaults to 60 seconds, and can be set via the PKGCONF_PYPI_WORKER_TIMEOUT
+    environment variable. A value of 0 disables the timeout.
+    """
+    try:
+        timeout = float(os.environ.get('PKGCONF_PYPI_WORKER_TIMEOUT') or 60)
+    except ValueError:
+        pkgconf._LOGGER.warning('Invalid PKGCONF_PYPI_WORKER_TIMEOUT value, ignoring')
+        timeout = 60
+    return timeout or None
 
-    def _worker_fn(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
-        payload = pickle.dumps((fn, args, kwargs))
-        length = len(payload).to_bytes(4, 'big')
 
-        proc.stdin.write(length)
-        proc.stdin.write(payload)
-        proc.stdin.flush()
+class _Worker:
+    """Worker subprocess, which runs the callables sent to it.
 
-        length_data = proc.stdout.read(4)
-        if not length_data:
+    Requests are tagged with an ID, so any number of threads can have requests
+    in flight, which the worker runs in order. If a call times out (see
+    :func:`worker_timeout`), the worker is killed, failing its other in-flight
+    requests. If the worker dies, a new one is started by the next call.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self.process: subprocess.Popen[bytes] | None = None
+        # Futures of the in-flight requests of the current process, by request ID
+        self._pending: dict[int, concurrent.futures.Future[Any]] = {}
+
+    def start(self) -> None:
+        """Start the worker subprocess, if it isn't running, without waiting for it to be ready.
+
+        The worker is also asked to import this module, so that it is ready to
+        run the import helpers.
+        """
+        with self._lock:
+            if self.process is None or self.process.poll() is not None:
+                self._submit(module_paths, ([],), {})
+
+    def _start(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            return
+        import site
+
+        site_dirs = [path for path in (*site.getsitepackages(), site.getusersitepackages()) if path in sys.path]
+        config = pickle.dumps((sys.path, site_dirs)).hex()
+        started = time.perf_counter_ns()
+        self.process = subprocess.Popen(
+            [sys.executable, '-I', '-S', '-u', '-c', _WORKER_CODE, config],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._pending = {}
+        reader = threading.Thread(target=self._read_responses, args=(self.process, self._pending, started), daemon=True)
+        reader.start()
+
+    def _read_responses(
+        self,
+        process: subprocess.Popen[bytes],
+        pending: dict[int, concurrent.futures.Future[Any]],
+        started: int,
+    ) -> None:
+        assert process.stdout
+        try:
+            while len(header := process.stdout.read(12)) == 12:
+                if started:
+                    # Until the first response, which is when the worker is ready
+                    pkgconf._trace.record(
+                        'worker start-up', started, time.perf_counter_ns(), 'isolated-context', pid=process.pid
+                    )
+                    started = 0
+                request_id, length = int.from_bytes(header[:8], 'big'), int.from_bytes(header[8:], 'big')
+                ok, value = pickle.loads(process.stdout.read(length))
+                with self._lock:
+                    future = pending.pop(request_id, None)
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        except Exception:
+            pkgconf._LOGGER.exception('Failed to read the worker subprocess response')
+        finally:
+            self._discard(process)
+            process.wait()
+            with self._lock:
+                failed = list(pending.values())
+                pending.clear()
+            for future in failed:
+                future.set_exception(RuntimeError('Subprocess died'))
+
+    def _discard(self, process: subprocess.Popen[bytes]) -> None:
+        """Make sure the next call starts a new process, if ``process`` is the current one."""
+        with self._lock:
+            if self.process is process:
+                self.process = None
+
+    def _submit(self, fn: Callable[..., T], args: tuple[Any, ...], kwargs: dict[str, Any]) -> concurrent.futures.Future[T]:
+        """Send a request to the worker, starting it if needed. Must be called with _lock held."""
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+        payload = pickle.dumps((fn, args, kwargs))
+        self._start()
+        assert self.process and self.process.stdin
+        request_id = next(self._request_ids)
+        self._pending[request_id] = future
+        try:
+            self.process.stdin.write(request_id.to_bytes(8, 'big') + len(payload).to_bytes(4, 'big') + payload)
+            self.process.stdin.flush()
+        except OSError:
+            self._pending.pop(request_id, None)
             msg = 'Subprocess died'
-            raise RuntimeError(msg)
-        resp_length = int.from_bytes(length_data, 'big')
-        data = proc.stdout.read(resp_length)
-        ok, value = pickle.loads(data)
+            raise RuntimeError(msg) from None
+        return future
 
-        if ok:
-            return value
-        else:
-            raise value
+    def __call__(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        with self._lock:
+            future = self._submit(fn, args, kwargs)
+            process = self.process
+        assert process
+
+        timeout = worker_timeout()
+        try:
+            with pkgconf._trace.span('worker call', 'isolated-context', function=fn.__name__, pid=process.pid):
+                return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if future.done():
+                raise
+            pkgconf._LOGGER.warning(f'Killing the worker subprocess, {fn.__name__} took longer than {timeout}s')
+            self._discard(process)
+            process.kill()
+            msg = f'{fn.__name__} took longer than {timeout}s in the worker subprocess'
+            raise TimeoutError(msg) from None
 
-    _worker = _worker_fn
+    def close(self) -> None:
+        with self._lock:
+            process, self.process = self.process, None
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=1)
+
+
+_worker: _Worker | None = None
+
+
+def _make_worker() -> None:
+    """Create the worker used by run_in_subprocess."""
+    global _worker
+    _worker = _Worker()
 
 
 def run_in_subprocess(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
     """Run callable in a subprocess."""
     if _worker is None:
         _make_worker()
+    assert _worker is not None
 
     return _worker(fn, *args, **kwargs)
 
 
-def _cleanup_isolated_contexts() -> None:
-    global _subinterpreter, _worker_process
+_warm_thread: threading.Thread | None = None
+
+
+def warm_isolated_context() -> None:
+    """Start the isolated context used by run_in_isolated_context in the background.
+
+    This lets its startup overlap with other work, like the entrypoint scan.
+    """
+    global _warm_thread
+
+    if sys.version_info >= (3, 14):
+        _warm_thread = threading.Thread(target=_warm_subinterpreter, daemon=True)
+        _warm_thread.start()
+    else:
+        if _worker is None:
+            _make_worker()
+        assert _worker is not None
+        _worker.start()
 
-    if _subinterpreter is not None:
-        _subinterpreter.close()
-        _subinterpreter = None
 
-    if _worker_process is not None:
-        _worker_process.terminate()
-        _worker_process.wait(timeout=1)
-        _worker_process = None
+def _warm_subinterpreter() -> None:
+    try:
+        run_in_subinterpreter(module_paths, [])
+    except Exception:
+        pkgconf._LOGGER.debug('Failed to start the subinterpreter', exc_info=True)
 
 
 def run_in_isolated_context(fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
     try:
         if sys.version_info >= (3, 14):
             return run_in_subinterpreter(fn, *args, **kwargs)
+    except TimeoutError:
+        # The call would most likely time out in the subprocess too
+        raise
     except Exception:
         pkgconf._LOGGER.exception(f'Failed to run {fn} in subinterpreter, falling back to subprocess')
     return run_in_subprocess(fn, *args, **kwargs)
 
 
+# Pool of additional isolated contexts, used to resolve modules in parallel
+
+_pool: list[Callable[..., Any]] = []
+_pool_subinterpreters: list[Any] = []
+_pool_workers: list[_Worker] = []
+
+
+def _make_pool_context() -> Callable[..., Any]:
+    if sys.version_info >= (3, 14):
+        try:
+            import concurrent.interpreters
+
+            with pkgconf._trace.span('subinterpreter start-up', 'isolated-context'):
+                interpreter = concurrent.interpreters.create()
+        except Exception:
+            pkgconf._LOGGER.exception('Failed to create subinterpreter, falling back to subprocess')
+        else:
+            _pool_subinterpreters.append(interpreter)
+            return functools.partial(_call_with_deadline, interpreter.call)
+    worker = _Worker()
+    _pool_workers.append(worker)
+    return worker
+
+
+def isolated_contexts(count: int) -> list[Callable[..., Any]]:
+    """Get ``count`` independent isolated contexts, creating them as needed.
+
+    The first one is the global isolated context (run_in_isolated_context). Each
+    context must only be used by one thread at a time.
+    """
+    while len(_pool) < count - 1:
+        _pool.append(_make_pool_context())
+    return [run_in_isolated_context, *_pool[: count - 1]]
+
+
+# Minimum number of entrypoints resolved by each isolated context. Resolving an
+# entrypoint usually takes a fraction of a millisecond, while starting a context
+# takes tens of milliseconds, so additional contexts only pay off with many
+# entrypoints to resolve.
+_MIN_ENTRYPOINTS_PER_CONTEXT = 128
+
+
+def pool_size(count: int, limit: int | None = None) -> int:
+    """Calculate the number of isolated contexts to use for ``count`` resolutions.
+
+    Each context gets at least _MIN_ENTRYPOINTS_PER_CONTEXT entrypoints, up to
+    the limit, which defaults to the PKGCONF_PYPI_MAX_WORKERS environment
+    variable, or the CPU count.
+    """
+    if limit is None:
+        try:
+            limit = int(os.environ.get('PKGCONF_PYPI_MAX_WORKERS') or os.cpu_count() or 1)
+        except ValueError:
+            pkgconf._LOGGER.warning('Invalid PKGCONF_PYPI_MAX_WORKERS value, ignoring')
+            limit = os.cpu_count() or 1
+    return max(1, min(count // _MIN_ENTRYPOINTS_PER_CONTEXT, limit))
+
+
+def _cleanup_isolated_contexts() -> None:
+    global _subinterpreter, _warm_thread, _worker
+
+    # The subinterpreter can't be closed while the warm-up call is running in it
+    if _warm_thread is not None:
+        _warm_thread.join()
+        _warm_thread = None
+    if _subinterpreter is not None:
+        _subinterpreter.close()
+        _subinterpreter = None
+
+    if _worker is not None:
+        _worker.close()
+        _worker = None
+
+    for interpreter in _pool_subinterpreters:
+        interpreter.close()
+    for worker in _pool_workers:
+        worker.close()
+    _pool.clear()
+    _pool_subinterpreters.clear()
+    _pool_workers.clear()
+
+
 atexit.register(_cleanup_isolated_contexts)
 
 
@@ -191,12 +483,172 @@ def replace_sys_modules() -> Iterable[None]:
         sys.modules = original
 
 
+# Entrypoint scanner
+
+# Entrypoint groups of each distribution metadata directory (including the
+# ones without entrypoints), keyed by the sys.path directory containing them,
+# and validated by its mtime.
+_index: dict[str, tuple[int, dict[str, list[str]]]] | None = None
+_index_lock = threading.Lock()
+# Directories modified this recently might still be changing within the same
+# mtime tick, so they aren't indexed.
+_RACY_WINDOW_NS = 2_000_000_000
+_GROUP_RE = re.compile(r'^\s*\[\s*([^\]]+?)\s*\]', re.MULTILINE)
+
+
+def _index_file() -> str:
+    return os.path.join('entry-points-index', f'{pkgconf._cache._interpreter_key()}.json')
+
+
+def _entry_point_groups(metadata_dir: str) -> list[str]:
+    try:
+        with open(os.path.join(metadata_dir, 'entry_points.txt'), encoding='utf-8') as f:
+            return _GROUP_RE.findall(f.read())
+    except (OSError, ValueError):
+        return []
+
+
+def _directory_index(directory: str) -> tuple[dict[str, list[str]], bool]:
+    """Get the entrypoint groups of each distribution in ``directory``, and whether the index changed.
+
+    Must be called with _index_lock held.
+    """
+    assert _index is not None
+    mtime = os.stat(directory).st_mtime_ns
+    if (cached := _index.get(directory)) and cached[0] == mtime:
+        return cached[1], False
+    with os.scandir(directory) as it:
+        names = sorted(item.name for item in it if item.name.endswith(pkgconf._cache._METADATA_SUFFIXES))
+    groups = {name: _entry_point_groups(os.path.join(directory, name)) for name in names}
+    if time.time_ns() - mtime < _RACY_WINDOW_NS:
+        return groups, False
+    _index[directory] = mtime, groups
+    return groups, True
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r'[-_.]+', '_', name).lower()
+
+
+def _load_index() -> None:
+    """Load the index from the cache, if it isn't loaded yet. Must be called with _index_lock held."""
+    global _index
+
+    if _index is None:
+        data = pkgconf._cache.read_json(_index_file()) if pkgconf._cache.enabled() else None
+        _index = {key: (value[0], value[1]) for key, value in data.items()} if isinstance(data, dict) else {}
+
+
+def scan_entry_points(group: str, path: list[str] | None = None) -> list[importlib.metadata.EntryPoint]:
+    """Find the entrypoints in ``group``, from the distributions in ``path`` (defaults to sys.path).
+
+    This is equivalent to ``importlib.metadata.entry_points(group=group)``, but
+    only the entry_points.txt files are read, instead of the full metadata of
+    every distribution. The entrypoint groups of the distributions in each
+    directory are kept in an index, cached on disk, and invalidated when the
+    directory mtime changes. Entries that aren't directories (eg. zip files) are
+    handled by importlib.metadata.
+    """
+    dists: list[importlib.metadata.Distribution] = []
+    seen = set()
+    changed = False
+    with _index_lock:
+        _load_index()
+        for entry in sys.path if path is None else path:
+            directory = os.path.abspath(entry or '.')
+            try:
+                index, directory_changed = _directory_index(directory)
+            except NotADirectoryError:
+                for dist in importlib.metadata.distributions(path=[entry]):
+                    if (normalized := _normalize_name(dist.metadata['Name'] or '')) not in seen:
+                        seen.add(normalized)
+                        dists.append(dist)
+                continue
+            except OSError:
+                continue
+            changed |= directory_changed
+            for name, groups in index.items():
+                # Like importlib.metadata.entry_points, only use the first distribution with a given name
+                if (normalized := _normalize_name(name.rpartition('.')[0].partition('-')[0])) in seen:
+                    continue
+                seen.add(normalized)
+                if group in groups:
+                    dists.append(importlib.metadata.PathDistribution(pathlib.Path(directory, name)))
+        if changed and pkgconf._cache.enabled():
+            pkgconf._cache.write_json(_index_file(), _index)
+
+    return [ep for dist in dists for ep in dist.entry_points.select(group=group)]
+
+
 # Entrypoint helpers
 
 
+STRATEGIES = ('import-system', 'translation-first')
+# Pre-resolved entrypoint paths, shipped in the distribution metadata (see pkgconf.build)
+PATHS_METADATA_FILE = 'pkg_config_paths.json'
+
+
+def resolution_strategy(strategy: str | None = None) -> str:
+    """Get the entrypoint path resolution strategy.
+
+    - ``import-system`` (default): Resolve the path via the import system, in an
+      isolated context, falling back to translating the module name to a path
+      in the distribution.
+    - ``translation-first``: Translate the module name to a path in the
+      distribution, and use it if it is confirmed by the distribution RECORD,
+      without importing anything. Otherwise (eg. namespace packages, editable
+      installs), fallback to the import system.
+
+    The default can be set via the PKGCONF_PYPI_RESOLUTION_STRATEGY environment
+    variable.
+    """
+    if strategy is None:
+        strategy = os.environ.get('PKGCONF_PYPI_RESOLUTION_STRATEGY') or STRATEGIES[0]
+    if strategy not in STRATEGIES:
+        msg = f'Unknown resolution strategy {strategy!r}, expected one of: {", ".join(STRATEGIES)}'
+        raise ValueError(msg)
+    return strategy
+
+
+class Resolution:
+    """Result of the resolution of an entrypoint path.
+
+    :param path: The resolved path.
+    :param strategy: How the path was resolved — ``metadata`` (pre-resolved path
+        metadata), ``translation`` (module name translation, verified by the
+        distribution RECORD), ``import-system``, or ``fallback`` (module name
+        translation, after the import system failed).
+    :param duration: Time spent resolving the path, in seconds. For entrypoints
+        resolved in a batch, the batch time is split evenly between them.
+    :param error: Why the import system failed, if it did.
+    :param cached: Whether the result was restored from a previous run.
+    """
+
+    def __init__(
+        self, path: str, strategy: str, duration: float = 0.0, error: str | None = None, cached: bool = False
+    ) -> None:
+        self.path = path
+        self.strategy = strategy
+        self.duration = duration
+        self.error = error
+        self.cached = cached
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={value!r}' for name, value in vars(self).items())
+        return f'{self.__class__.__name__}({fields})'
+
+
 class EntryPoint:
-    def __init__(self, entrypoint: importlib.metadata.EntryPoint) -> None:
+    def __init__(self, entrypoint: importlib.metadata.EntryPoint, strategy: str | None = None) -> None:
         self._ep = entrypoint
+        self._strategy = resolution_strategy(strategy)
+        # Result from module_paths, and the time it took, if resolved in a batch (see entry_points)
+        self._isolated_result: tuple[bool, str] | TimeoutError | None = None
+        self._isolated_duration = 0.0
+        # Resolution result, which may also be restored from the resolution state (see entry_points)
+        self._resolution: Resolution | None = None
+        # Distribution info reported by the PathWarning, if the import system failed
+        self._failure_distribution: str | None = None
 
     @property
     def name(self) -> str:
@@ -214,29 +666,65 @@ class EntryPoint:
     def dist(self) -> importlib.metadata.Distribution | None:
         return self._ep.dist
 
+    @property
+    def resolution(self) -> Resolution:
+        """The path resolution result, which is only computed once."""
+        if self._resolution is None:
+            with pkgconf._trace.span('resolve entrypoint', 'entrypoints', name=self.name, value=self.value) as trace_args:
+                start = time.perf_counter()
+                path, strategy, error = self._resolve_path()
+                duration = time.perf_counter() - start + self._isolated_duration
+                self._resolution = Resolution(path, strategy, duration, error)
+                trace_args['strategy'] = strategy
+        return self._resolution
+
     @property
     def path(self) -> str:
+        return self.resolution.path
+
+    def _resolve_path(self) -> tuple[str, str, str | None]:
+        if self._static_path:
+            return self._static_path, 'metadata', None
+        if self._strategy == 'translation-first' and self._verified_translation:
+            return self._verified_translation, 'translation', None
         try:
-            return self._resolve_via_import_system()
-        except Exception:
+            return self._resolve_via_import_system(), 'import-system', None
+        except Exception as e:
+            error = f'{e.__class__.__name__}: {e}'
             msg = 'Failed to resolve the entrypoint path via the import system (see log for details)'
             pkgconf._LOGGER.exception(msg)
-            warnings.warn(PathWarning(msg, self), stacklevel=2)
+            warning = PathWarning(msg, self)
+            self._failure_distribution = warning._distribution
+            warnings.warn(warning, stacklevel=4)
         # Fallback method
-        return self._resolve_via_translation()
+        return self._resolve_via_translation(), 'fallback', error
 
     def _resolve_via_import_system(self) -> str:
         # module_path is not safe to run directly in the execution context, as
         # it alters the import state, so try to run it in an isolated context.
         try:
-            return run_in_isolated_context(module_path, self.value)
+            return self._resolve_in_isolated_context()
+        except TimeoutError:
+            # The import would most likely hang in the current context too
+            raise
         except Exception:
             pkgconf._LOGGER.exception('Failed to run module_path in isolated context')
         # Fallback to running in the current context, but try to save and
         # restore the original import state.
-        with replace_sys_modules():
+        with replace_sys_modules(), pkgconf._trace.span('in-process call', 'isolated-context', function='module_path'):
             return module_path(self.value)
 
+    def _resolve_in_isolated_context(self) -> str:
+        if self._isolated_result is None:
+            return run_in_isolated_context(module_path, self.value)
+        if isinstance(self._isolated_result, TimeoutError):
+            # The batch timed out, so resolving it on its own would most likely time out too
+            raise TimeoutError(*self._isolated_result.args)
+        ok, value = self._isolated_result
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
     def _resolve_via_translation(self) -> str:
         assert self.dist
         subpath = pathlib.PurePath(*self.value.split('.'))
@@ -244,42 +732,245 @@ class EntryPoint:
         assert isinstance(dist_path, os.PathLike)
         return os.fsdecode(os.fspath(dist_path))
 
+    @functools.cached_property
+    def _state_key(self) -> tuple[str, int] | None:
+        """Key identifying the entrypoint in the resolution state, and the mtime of its distribution RECORD.
+
+        If the distribution has no RECORD, the mtime of its metadata directory
+        is used instead.
+        """
+        # Only distributions on the filesystem are supported. Their metadata
+        # directory isn't exposed by the public API, other than by parsing the
+        # whole RECORD (Distribution.files), which would defeat the purpose of
+        # the state, so it's taken from the PathDistribution internals.
+        if not isinstance(self.dist, importlib.metadata.PathDistribution):
+            return None
+        metadata_dir = getattr(self.dist, '_path', None)
+        if metadata_dir is None:
+            return None
+        for file in (os.path.join(metadata_dir, 'RECORD'), metadata_dir):
+            try:
+                mtime = os.stat(file).st_mtime_ns
+            except OSError:
+                continue
+            return f'{os.fspath(metadata_dir)}\0{self.name}\0{self.value}', mtime
+        return None
+
+    @functools.cached_property
+    def _static_path(self) -> str | None:
+        """Path from the pre-resolved path metadata file shipped by the distribution, if it exists."""
+        if not self.dist:
+            return None
+        try:
+            paths = json.loads(self.dist.read_text(PATHS_METADATA_FILE) or '{}')
+            dist_path = self.dist.locate_file(paths[self.name])
+        except (ValueError, KeyError, TypeError, NotImplementedError):
+            return None
+        # Like in _resolve_via_translation, only distributions on the filesystem are supported
+        if not isinstance(dist_path, os.PathLike):
+            return None
+        path = os.fsdecode(os.fspath(dist_path))
+        return path if os.path.isdir(path) else None
+
+    @property
+    def _resolved_without_import(self) -> bool:
+        return bool(self._static_path or (self._strategy == 'translation-first' and self._verified_translation))
+
+    @functools.cached_property
+    def _verified_translation(self) -> str | None:
+        """Path from _resolve_via_translation, if it can be confirmed without importing anything.
 
-def entry_points(**select_params: Any) -> list[EntryPoint]:
-    original_eps = importlib.metadata.entry_points(**select_params)
-    our_eps = map(EntryPoint, original_eps)
-    valid_eps = filter(operator.attrgetter('path'), our_eps)
+        The path is considered valid if it is a regular package (has an
+        __init__.py) listed in the distribution RECORD, and exists.
+        """
+        if not self.dist:
+            return None
+        init = '/'.join([*self.value.split('.'), '__init__.py'])
+        record = self.dist.read_text('RECORD') or ''
+        if not any(line.startswith((f'{init},', f'"{init}",')) for line in record.splitlines()):
+            return None
+        try:
+            path = self._resolve_via_translation()
+        except (AssertionError, NotImplementedError):
+            return None
+        return path if os.path.isdir(path) else None
+
+
+def entry_points(
+    *,
+    max_workers: int | None = None,
+    strategy: str | None = None,
+    **select_params: Any,
+) -> list[EntryPoint]:
+    """Get the entrypoints matching ``select_params``, with a valid path.
+
+    :param max_workers: Maximum number of isolated contexts used to resolve the
+        entrypoints in parallel (see :func:`pool_size`).
+    :param strategy: Path resolution strategy (see :func:`resolution_strategy`).
+    """
+    state = _load_state()
+    # Without a previous state, most entrypoints will probably need to be resolved
+    # via the import system, so start the isolated context while we scan them.
+    # Environments without entrypoints store an empty state, so they don't.
+    if state is None and resolution_strategy(strategy) == 'import-system':
+        warm_isolated_context()
+    original_eps: Iterable[importlib.metadata.EntryPoint]
+    with pkgconf._trace.span('scan entrypoints', 'metadata', select=select_params):
+        if select_params.keys() == {'group'}:
+            original_eps = scan_entry_points(select_params['group'])
+        else:
+            # select_params isn't empty, so this isn't the SelectableGroups overload (Python < 3.12)
+            original_eps = cast('importlib.metadata.EntryPoints', importlib.metadata.entry_points(**select_params))
+    our_eps = [EntryPoint(ep, strategy) for ep in original_eps]
+    _restore_state(our_eps, state or {})
+    # Entrypoints with a pre-resolved path, or resolved by translation, don't need an isolated context
+    pending = [ep for ep in our_eps if ep._resolution is None and not ep._resolved_without_import]
+    workers = pool_size(len(pending), max_workers)
+    if workers > 1:
+        _resolve_in_parallel(pending, workers)
+    else:
+        _resolve_in_batch(pending)
+    valid_eps = list(filter(operator.attrgetter('path'), our_eps))
+    _store_state(our_eps, state)
     return sorted(valid_eps, key=operator.attrgetter('name'))
 
 
+# Incremental resolution state
+#
+# The resolved path of each entrypoint is kept across runs, keyed by the
+# distribution metadata directory, and the entrypoint name and value, and
+# validated by the mtime of the distribution RECORD, so that when the
+# environment changes, only the entrypoints from the added or modified
+# distributions need to be resolved.
+
+
+def _state_file() -> str:
+    return os.path.join('entry-points', f'{pkgconf._cache._interpreter_key()}.json')
+
+
+def _load_state() -> dict[str, dict[str, Any]] | None:
+    state = pkgconf._cache.read_json(_state_file()) if pkgconf._cache.enabled() else None
+    return state if isinstance(state, dict) else None
+
+
+def _restore_state(eps: list[EntryPoint], state: dict[str, dict[str, Any]]) -> None:
+    """Restore the paths of the entrypoints whose distribution didn't change.
+
+    Paths resolved by the import system, or the distribution metadata, are only
+    restored if they still exist. Failures to resolve the path via the import
+    system are remembered, per distribution installation, so the fallback path
+    is restored directly, and the failure reported with a single warning.
+    """
+    for ep in eps:
+        if not (key := ep._state_key) or not isinstance(entry := state.get(key[0]), dict) or entry.get('mtime') != key[1]:
+            continue
+        path, resolved_by = entry.get('path'), entry.get('resolved_by')
+        if not isinstance(path, str) or not isinstance(resolved_by, str):
+            continue
+        error = None
+        if resolved_by == 'fallback':
+            error, ep._failure_distribution = str(entry.get('error')), str(entry.get('distribution'))
+            msg = f'Failed to resolve the entrypoint path via the import system (cached result): {error}'
+            warnings.warn(PathWarning(msg, ep, ep._failure_distribution), stacklevel=3)
+        elif not os.path.isdir(path):
+            continue
+        ep._resolution = Resolution(path, resolved_by, error=error, cached=True)
+
+
+def _store_state(eps: list[EntryPoint], previous: dict[str, dict[str, Any]] | None) -> None:
+    """Save the paths of the resolved entrypoints, dropping the ones that no longer exist."""
+    if not pkgconf._cache.enabled():
+        return
+    state = {}
+    for ep in eps:
+        if (key := ep._state_key) and ep.path:
+            state[key[0]] = {'mtime': key[1], 'path': ep.path, 'resolved_by': ep.resolution.strategy}
+            if ep.resolution.error is not None:
+                state[key[0]].update(error=ep.resolution.error, distribution=ep._failure_distribution)
+    if state != previous:
+        pkgconf._cache.write_json(_state_file(), state)
+
+
+def path_entry_points(path: list[str], *, group: str) -> list[EntryPoint] | None:
+    """Get the entrypoints in ``group``, from the distributions in ``path``.
+
+    This is meant for distributions that are not importable from the current
+    interpreter (eg. installed in a virtual environment stacked on top of the
+    current environment), so paths are only resolved via the pre-resolved path
+    metadata, or by translation. If any of the entrypoint paths can't be
+    resolved this way, None is returned.
+    """
+    eps = [EntryPoint(ep, 'translation-first') for ep in scan_entry_points(group, path)]
+    if not all(ep._resolved_without_import for ep in eps):
+        return None
+    return sorted(eps, key=operator.attrgetter('name'))
+
+
+def _resolve_in_batch(eps: list[EntryPoint], run: Callable[..., Any] | None = None) -> None:
+    """Resolve the entrypoint modules in a single isolated context round trip.
+
+    :param run: Isolated context to use (see :func:`isolated_contexts`),
+        defaults to the global one.
+    """
+    if not eps:
+        return
+    if run is None:
+        run = run_in_isolated_context
+    start = time.perf_counter()
+    try:
+        with pkgconf._trace.span('resolve entrypoints in batch', 'entrypoints', count=len(eps)):
+            results = run(module_paths, [ep.value for ep in eps])
+    except TimeoutError as e:
+        # Fail all the entrypoints of the batch, instead of waiting for each of them to time out
+        pkgconf._LOGGER.warning(f'Failed to run module_paths in isolated context: {e}')
+        for ep in eps:
+            ep._isolated_result = e
+        return
+    except Exception:
+        pkgconf._LOGGER.exception('Failed to run module_paths in isolated context')
+        return
+    duration = (time.perf_counter() - start) / len(eps)
+    for ep, result in zip(eps, results, strict=True):
+        ep._isolated_result, ep._isolated_duration = result, duration
+
+
+def _resolve_in_parallel(eps: list[EntryPoint], workers: int) -> None:
+    """Resolve the entrypoint modules, split in a batch per isolated context, resolved in parallel."""
+    chunks = [eps[index::workers] for index in range(workers)]
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        list(executor.map(_resolve_in_batch, chunks, isolated_contexts(workers)))
+
+
 class PathWarning(Warning):
-    def __init__(self, message: str, entrypoint: EntryPoint) -> None:
+    def __init__(self, message: str, entrypoint: EntryPoint, distribution: str | None = None) -> None:
         super().__init__(message)
         self._entrypoint = entrypoint
+        self._distribution = distribution or self._distribution_info(entrypoint)
         self._logger = pkgconf._LOGGER.getChild(self.__class__.__name__)
         self._logger.warning(
             message,
             extra={
                 'entrypoint': self._entrypoint,
-                'distribution': self._distribution_info(),
+                'distribution': self._distribution,
             },
         )
 
-    def _distribution_info(self) -> str:
-        assert self._entrypoint.dist
-        info = f'{self._entrypoint.dist.name}-{self._entrypoint.dist.version}'
-        if metadata_path := self._find_metadata_path():
+    @classmethod
+    def _distribution_info(cls, entrypoint: EntryPoint) -> str:
+        assert entrypoint.dist
+        info = f'{entrypoint.dist.name}-{entrypoint.dist.version}'
+        if metadata_path := cls._find_metadata_path(entrypoint.dist):
             info += f' at {metadata_path!r}'
         return info
 
-    def _find_metadata_path(self) -> str | None:
-        assert self._entrypoint.dist
+    @staticmethod
+    def _find_metadata_path(dist: importlib.metadata.Distribution) -> str | None:
         try:
-            dist_root = self._entrypoint.dist.locate_file('')
+            dist_root = dist.locate_file('')
         except NotImplementedError:
             return None
 
-        for file in self._entrypoint.dist.files or []:
+        for file in dist.files or []:
             if file.parts[0].endswith('.dist-info'):
                 return str(dist_root / file.parts[0])
         return None
@@ -0,0 +1,338 @@
+"""In-process pkgconf query engine.
+
+This supports a subset of the pkgconf functionality (--exists, --modversion,
+--variable, --cflags, --libs and --static), for simple .pc files. Queries that
+use any other functionality, or that fail, raise :class:`Unsupported`, in which
+case the caller should run the pkgconf executable instead.
+"""
+
+import os
+import re
+
+from collections.abc import Iterator, Mapping
+
+
+class Unsupported(Exception):
+    """The query can't be handled by the in-process engine."""
+
+
+def enabled(env: Mapping[str, str] = os.environ) -> bool:
+    # pkgconf relocates the prefix variable by default on Windows (--define-prefix)
+    return env.get('PKGCONF_PYPI_ENGINE') == 'python' and os.name == 'posix'
+
+
+# Version comparison
+
+
+_VERSION_SEGMENT_RE = re.compile(r'~|\d+|[a-zA-Z]+')
+
+
+def compare_versions(a: str, b: str) -> int:
+    """Compare versions, using the same algorithm as pkgconf (rpmvercmp)."""
+    if a == b:
+        return 0
+    segments_a, segments_b = _VERSION_SEGMENT_RE.findall(a), _VERSION_SEGMENT_RE.findall(b)
+    for x, y in zip(segments_a, segments_b, strict=False):
+        if x == '~' or y == '~':
+            if x != y:
+                return -1 if x == '~' else 1
+        elif x.isdigit() != y.isdigit():
+            # Numeric segments are newer than alphabetic ones
+            return 1 if x.isdigit() else -1
+        elif x.isdigit():
+            if int(x) != int(y):
+                return 1 if int(x) > int(y) else -1
+        elif x != y:
+            return 1 if x > y else -1
+    if len(segments_a) == len(segments_b):
+        return 0
+    # The version with remaining segments is newer, unless they start with a tilde
+    longer = 1 if len(segments_a) > len(segments_b) else -1
+    remaining = (segments_a if longer == 1 else segments_b)[min(len(segments_a), len(segments_b))]
+    return -longer if remaining == '~' else longer
+
+
+_OPERATORS = {
+    '<': lambda result: result < 0,
+    '<=': lambda result: result <= 0,
+    '=': lambda result: result == 0,
+    '!=': lambda result: result != 0,
+    '>=': lambda result: result >= 0,
+    '>': lambda result: result > 0,
+}
+
+
+def parse_dependencies(value: str) -> list[tuple[str, str | None, str | None]]:
+    """Parse a dependency list (eg. Requires), into (name, operator, version) tuples."""
+    tokens = value.replace(',', ' , ').split()
+    dependencies: list[tuple[str, str | None, str | None]] = []
+    i = 0
+    while i < len(tokens):
+        name = tokens[i]
+        i += 1
+        if name == ',':
+            continue
+        if any(char in name for char in '<>=!'):
+            raise Unsupported(name)
+        if i < len(tokens) and tokens[i] in _OPERATORS:
+            if i + 1 >= len(tokens) or tokens[i + 1] == ',':
+                raise Unsupported(value)
+            dependencies.append((name, tokens[i], tokens[i + 1]))
+            i += 2
+        else:
+            dependencies.append((name, None, None))
+    return dependencies
+
+
+# .pc file parsing
+
+
+_KEY_RE = re.compile(r'\s*([A-Za-z0-9_.]+)\s*([:=])\s*(.*?)\s*$')
+_VARIABLE_RE = re.compile(r'\$\{([^}]*)\}')
+
+
+class Package:
+    """Parsed .pc file."""
+
+    def __init__(self, name: str, path: str) -> None:
+        self.name = name
+        self.path = path
+        self._variables: dict[str, str] = {}
+        self._fields: dict[str, str] = {}
+
+        with open(path, encoding='utf-8') as f:
+            for line in self._logical_lines(f):
+                if not (match := _KEY_RE.match(line)):
+                    continue
+                key, operator, value = match.groups()
+                if operator == '=':
+                    self._variables.setdefault(key, value)
+                else:
+                    self._fields.setdefault(key.lower(), value)
+
+    @staticmethod
+    def _logical_lines(lines: Iterator[str]) -> Iterator[str]:
+        buffer = ''
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if line.endswith('\\'):
+                buffer += line[:-1]
+                continue
+            line, buffer = buffer + line, ''
+            if '\\' in line:
+                msg = 'escape sequences'
+                raise Unsupported(msg)
+            yield line.split('#', 1)[0]
+        if buffer:
+            yield buffer.split('#', 1)[0]
+
+    def variable(self, name: str, _seen: frozenset[str] = frozenset()) -> str:
+        if name in _seen:
+            msg = f'recursive variable {name!r}'
+            raise Unsupported(msg)
+        if name in self._variables:
+            return self.expand(self._variables[name], _seen | {name})
+        if name == 'pcfiledir':
+            return os.path.dirname(self.path)
+        if name == 'pc_sysrootdir':
+            return '/'
+        if name.startswith('pc_'):
+            msg = f'builtin variable {name!r}'
+            raise Unsupported(msg)
+        return ''
+
+    def expand(self, value: str, _seen: frozenset[str] = frozenset()) -> str:
+        return _VARIABLE_RE.sub(lambda match: self.variable(match.group(1), _seen), value)
+
+    def field(self, name: str) -> str:
+        return self.expand(self._fields.get(name.lower(), ''))
+
+    @property
+    def version(self) -> str:
+        return self.field('Version')
+
+    def flags(self, name: str) -> list[str]:
+        value = self.field(name)
+        if any(char in value for char in '\'"\\'):
+            msg = f'quoted {name} in {self.path}'
+            raise Unsupported(msg)
+        return value.split()
+
+    def dependencies(self, name: str) -> list[tuple[str, str | None, str | None]]:
+        return parse_dependencies(self.field(name))
+
+
+# Parsed packages, keyed by path, and validated by mtime
+_packages: dict[str, tuple[int, Package]] = {}
+
+
+def load_package(name: str, path: str) -> Package:
+    mtime = os.stat(path).st_mtime_ns
+    cached = _packages.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    package = Package(name, path)
+    _packages[path] = mtime, package
+    return package
+
+
+# Queries
+
+
+# Fragments that take an argument, which we don't support
+_SEPARATE_ARGUMENT_FLAGS = frozenset({'-framework', '-isystem', '-idirafter', '-include', '-iquote', '-Xlinker'})
+# pkgconf filters fragments pointing to the system directories
+_SYSTEM_DIRS = frozenset({'/usr/include', '/usr/lib', '/usr/lib32', '/usr/lib64', '/lib', '/lib32', '/lib64'})
+_SYSTEM_MULTIARCH_DIR_RE = re.compile(r'/(usr/)?lib/[^/]+-linux-[^/]+')
+# Environment variables that change the pkgconf behavior in ways we don't support
+_UNSUPPORTED_ENV = (
+    'PKG_CONFIG_SYSROOT_DIR',
+    'PKG_CONFIG_ALLOW_SYSTEM_CFLAGS',
+    'PKG_CONFIG_ALLOW_SYSTEM_LIBS',
+    'PKG_CONFIG_SYSTEM_INCLUDE_PATH',
+    'PKG_CONFIG_SYSTEM_LIBRARY_PATH',
+    'PKG_CONFIG_PURE_DEPGRAPH',
+    'PKG_CONFIG_MAXIMUM_TRAVERSE_DEPTH',
+    'PKG_CONFIG_RELOCATE_PATHS',
+    'PKG_CONFIG_MSVC_SYNTAX',
+    'PKG_CONFIG_FDO_SYSROOT_RULES',
+)
+_MAX_VISITS = 10_000
+
+
+def _merge_fragments(fragments: list[str]) -> list[str]:
+    """Deduplicate fragments like pkgconf, keeping the first -I/-L and the last of any other."""
+    merged: list[str] = []
+    for fragment in fragments:
+        if fragment in _SEPARATE_ARGUMENT_FLAGS:
+            raise Unsupported(fragment)
+        if fragment.startswith(('-I', '-L')):
+            path = os.path.normpath(fragment[2:])
+            if path in _SYSTEM_DIRS or _SYSTEM_MULTIARCH_DIR_RE.fullmatch(path):
+                msg = f'system directory fragment {fragment!r}'
+                raise Unsupported(msg)
+            if fragment not in merged:
+                merged.append(fragment)
+        else:
+            if fragment in merged:
+                merged.remove(fragment)
+            merged.append(fragment)
+    return merged
+
+
+class Query:
+    def __init__(self, env: Mapping[str, str]) -> None:
+        if any(env.get(var) for var in _UNSUPPORTED_ENV):
+            msg = 'environment'
+            raise Unsupported(msg)
+        self._search_dirs = [
+            directory
+            for var in ('PKG_CONFIG_PATH', 'PKG_CONFIG_LIBDIR')
+            for directory in env.get(var, '').split(os.pathsep)
+            if directory
+        ]
+        self._visits = 0
+
+    def find(self, name: str, operator: str | None = None, version: str | None = None) -> Package:
+        for directory in self._search_dirs:
+            if os.path.exists(os.path.join(directory, f'{name}-uninstalled.pc')):
+                msg = f'uninstalled package {name!r}'
+                raise Unsupported(msg)
+            path = os.path.join(directory, f'{name}.pc')
+            if os.path.isfile(path):
+                package = load_package(name, path)
+                break
+        else:
+            msg = f'package {name!r} not found'
+            raise Unsupported(msg)
+        if operator and version and not _OPERATORS[operator](compare_versions(package.version, version)):
+            msg = f'package {name!r} version mismatch'
+            raise Unsupported(msg)
+        if package.field('Conflicts'):
+            msg = f'package {name!r} has conflicts'
+            raise Unsupported(msg)
+        return package
+
+    def _fragments(self, package: Package, field: str, static: bool, stack: tuple[str, ...]) -> list[str]:
+        self._visits += 1
+        if self._visits > _MAX_VISITS:
+            msg = 'dependency graph too large'
+            raise Unsupported(msg)
+        fragments = package.flags(field)
+        if static:
+            fragments += package.flags(f'{field}.private')
+        # Like pkgconf, the private dependencies are always used for the cflags
+        requires = ('Requires', 'Requires.private') if field == 'Cflags' or static else ('Requires',)
+        for dependency_field in requires:
+            for dependency in package.dependencies(dependency_field):
+                if dependency[0] not in stack:
+                    fragments += self._fragments(self.find(*dependency), field, static, (*stack, dependency[0]))
+        return fragments
+
+    def fragments(self, world: list[Package], field: str, static: bool) -> list[str]:
+        """Get the merged fragments of ``field`` for the packages in ``world``, and their dependencies."""
+        fragments = []
+        for package in world:
+            fragments += self._fragments(package, field, static, (package.name,))
+        return _merge_fragments(fragments)
+
+
+def _parse_args(args: list[str]) -> tuple[list[str], str | None, bool, list[str]]:
+    """Parse the query arguments, into the modes, variable name, static flag, and package names."""
+    modes: list[str] = []
+    variable: str | None = None
+    static = False
+    names: list[str] = []
+    arguments = iter(args)
+    for arg in arguments:
+        if arg in ('--exists', '--modversion', '--cflags', '--libs'):
+            modes.append(arg)
+        elif arg == '--static':
+            static = True
+        elif arg in ('--print-errors', '--short-errors', '--silence-errors'):
+            pass  # Errors are always handled by pkgconf
+        elif arg == '--variable' or arg.startswith('--variable='):
+            modes.append('--variable')
+            variable = arg.partition('=')[2] if '=' in arg else next(arguments, None)
+        elif arg.startswith('-'):
+            raise Unsupported(arg)
+        else:
+            names.append(arg)
+    if not modes or not names or (len(modes) > 1 and not set(modes) <= {'--cflags', '--libs'}):
+        msg = ' '.join(args)
+        raise Unsupported(msg)
+    return modes, variable, static, names
+
+
+def run(args: list[str], env: Mapping[str, str]) -> tuple[int, str, str]:
+    """Run a pkgconf query in-process, returning the return code, stdout and stderr.
+
+    Raises :class:`Unsupported` if the query needs to be run by pkgconf.
+    """
+    modes, variable, static, names = _parse_args(args)
+    # pkgconf keeps the repeated fragments of static links, since their order
+    # matters, instead of merging them, so leave those to pkgconf
+    if static and '--libs' in modes:
+        msg = '--static --libs'
+        raise Unsupported(msg)
+
+    query = Query(env)
+    world = [query.find(*dependency) for dependency in parse_dependencies(' '.join(names))]
+    # Make sure the full dependency graph can be resolved
+    query.fragments(world, 'Cflags', static)
+    if modes == ['--exists']:
+        return 0, '', ''
+    if modes == ['--modversion']:
+        return 0, ''.join(f'{package.version}\n' for package in world), ''
+    if modes == ['--variable']:
+        if not variable:
+            msg = '--variable'
+            raise Unsupported(msg)
+        return 0, ' '.join(package.variable(variable) for package in world) + '\n', ''
+
+    # Like pkgconf, the cflags always come first, regardless of the argument order
+    fragments = []
+    for mode, field in (('--cflags', 'Cflags'), ('--libs', 'Libs')):
+        if mode in modes:
+            fragments += query.fragments(world, field, static)
+    return 0, ''.join(f'{fragment} ' for fragment in fragments) + '\n', ''
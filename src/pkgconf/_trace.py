@@ -0,0 +1,133 @@
+"""Timing spans of the pkgconf-pypi phases, in the Chrome trace event format.
+
+If the PKGCONF_PYPI_TRACE environment variable is set to a file path, a
+complete event is recorded for each phase (executable discovery, entrypoint
+scan and resolution, worker start-up, pkgconf process, etc.), and the events are
+appended to the file when the process exits.
+
+The file uses the JSON Array Format, without the closing bracket, which is
+optional, so that the events of every invocation (eg. all the pkg-config calls
+from a build) can be appended to the same file, and loaded as a single timeline
+(eg. in Perfetto, or chrome://tracing).
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import shlex
+import sys
+import threading
+import time
+
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+
+try:
+    import resource
+except ModuleNotFoundError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+# Offset to convert time.perf_counter_ns() values to a wall clock time, so that
+# the events of different processes can be put in the same timeline
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+_events: list[dict[str, Any]] = []
+_events_lock = threading.Lock()
+
+
+def trace_file() -> str | None:
+    return os.environ.get('PKGCONF_PYPI_TRACE') or None
+
+
+def enabled() -> bool:
+    return trace_file() is not None
+
+
+def record(name: str, start: int, end: int, category: str = 'pkgconf', /, **args: Any) -> None:
+    """Record a complete event, from ``start`` to ``end`` (time.perf_counter_ns() values)."""
+    if not enabled():
+        return
+    event = {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'ts': (start + _EPOCH_OFFSET_NS) / 1000,
+        'dur': (end - start) / 1000,
+        'pid': os.getpid(),
+        'tid': threading.get_native_id(),
+        'args': args,
+    }
+    with _events_lock:
+        _events.append(event)
+
+
+@contextlib.contextmanager
+def span(name: str, category: str = 'pkgconf', /, **args: Any) -> Iterator[dict[str, Any]]:
+    """Record the duration of the block, or of the decorated function, if tracing is enabled.
+
+    The yielded dictionary is recorded as the event arguments, so that the block
+    can add to them.
+    """
+    if not enabled():
+        yield args
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as e:
+        args['error'] = f'{e.__class__.__name__}: {e}'
+        raise
+    finally:
+        record(name, start, time.perf_counter_ns(), category, **args)
+
+
+def _children_usage() -> Any:
+    return resource.getrusage(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+
+@contextlib.contextmanager
+def process_span(cmd: Sequence[str], name: str = 'pkgconf') -> Iterator[dict[str, Any]]:
+    """Same as :func:`span`, for a block running the ``cmd`` child process.
+
+    On POSIX, the CPU time and maximum RSS of the child processes that exited
+    during the block are also recorded, which only match the ones of ``cmd`` if
+    no other child process exited at the same time (eg. with run_many).
+    """
+    with span(name, 'process', cmd=shlex.join(cmd)) as args:
+        before = _children_usage() if enabled() else None
+        yield args
+        if before is not None and (after := _children_usage()) is not None:
+            args['user_time'] = after.ru_utime - before.ru_utime
+            args['system_time'] = after.ru_stime - before.ru_stime
+            # ru_maxrss is the maximum of all the child processes, so it's only known if it increased
+            if after.ru_maxrss > before.ru_maxrss:
+                # Kilobytes on Linux, bytes on macOS
+                args['max_rss'] = after.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def flush() -> None:
+    """Append the recorded events to the trace file, ignoring any errors."""
+    with _events_lock:
+        events = _events[:]
+        _events.clear()
+    if not events or not (path := trace_file()):
+        return
+    metadata = {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': shlex.join(sys.argv)}}
+    data = ''.join(f'{json.dumps(event, default=str)},\n' for event in (metadata, *events)).encode()
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                data = b'[\n' + data
+            # A single write, so that the events of concurrent processes don't get mixed
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+atexit.register(flush)
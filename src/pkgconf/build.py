@@ -0,0 +1,46 @@
+"""Helpers for build backends, to ship pre-resolved ``pkg_config`` entrypoint paths.
+
+Distributions can include a ``pkg_config_paths.json`` file in their
+``.dist-info`` directory, mapping their ``pkg_config`` entrypoint names to the
+entrypoint directory, relative to the installation root (the directory
+containing the ``.dist-info`` directory). When present, ``pkgconf-pypi`` uses it
+instead of resolving the entrypoint modules, which requires importing them.
+"""
+
+import json
+import os
+import pathlib
+
+from collections.abc import Mapping
+
+import pkgconf._path_entrypoints
+
+
+METADATA_FILE = pkgconf._path_entrypoints.PATHS_METADATA_FILE
+
+
+def pkg_config_paths(entry_points: Mapping[str, str]) -> dict[str, str]:
+    """Calculate the relative paths for ``pkg_config`` entrypoints pointing to regular packages.
+
+    :param entry_points: Mapping of entrypoint names to values (module names).
+    """
+    return {name: '/'.join(value.split('.')) for name, value in entry_points.items()}
+
+
+def write_metadata(dist_info: str | os.PathLike[str], paths: Mapping[str, str]) -> pathlib.Path:
+    """Write the pre-resolved path metadata file to a ``.dist-info`` directory.
+
+    This needs to be called before the distribution RECORD is written, so that
+    the file is listed in it.
+
+    :param dist_info: Path of the ``.dist-info`` directory.
+    :param paths: Mapping of entrypoint names to directories, relative to the
+        installation root, using forward slashes (see :func:`pkg_config_paths`).
+    """
+    for name, path in paths.items():
+        if pathlib.PurePosixPath(path).is_absolute() or '\\' in path:
+            msg = f'The path for the {name!r} entrypoint must be a relative POSIX path, got {path!r}'
+            raise ValueError(msg)
+    file = pathlib.Path(dist_info, METADATA_FILE)
+    file.write_text(json.dumps(dict(paths), indent=2, sort_keys=True) + '\n', encoding='utf-8')
+    return file
@@ -1,22 +1,178 @@
+import argparse
+import contextlib
+import importlib.metadata
+import json
 import os
+import time
+import warnings
+
+from collections.abc import Callable
+from typing import Any
 
 import pkgconf
+import pkgconf._path_entrypoints
+
+
+# Query used to measure the pkgconf latency, which needs to search the whole search path
+REFERENCE_QUERY = ('--exists', 'pkgconf-pypi-diagnose-reference-query')
 
 
 def report() -> None:
     print(f'pkgconf executable: {pkgconf.get_executable()}')
 
+    pkg_config_path, entrypoints = pkgconf._get_pkg_config_path()
+    if entrypoints is None:
+        entrypoints = pkgconf._entry_points()
+
     print('entrypoints:')
-    for entrypoint in pkgconf._entry_points():
+    for entrypoint in entrypoints:
+        resolution = entrypoint.resolution
         print(f'  {entrypoint.name}:')
-        print(f'    value: {entrypoint.value}')
-        print(f'     path: {entrypoint.path}')
+        print(f'       value: {entrypoint.value}')
+        print(f'        path: {resolution.path}')
+        print(f'    strategy: {resolution.strategy}{" (cached)" if resolution.cached else ""}')
+        print(f'        time: {resolution.duration * 1000:.1f}ms')
+        if resolution.error:
+            print(f'       error: {resolution.error}')
 
-    print(f'PKG_CONFIG_PATH: {os.pathsep.join(pkgconf.get_pkg_config_path())}')
+    print(f'PKG_CONFIG_PATH: {os.pathsep.join(pkg_config_path)}')
 
 
-if __name__ == '__main__':
+def _timed(fn: Callable[[], str | None]) -> dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result: dict[str, Any] = {'path': fn()}
+    except Exception as e:
+        result = {'path': None, 'error': f'{e.__class__.__name__}: {e}'}
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def _import_system_timing(original: importlib.metadata.EntryPoint) -> dict[str, Any]:
+    """Resolve the entrypoint via the import system, in a new worker subprocess.
+
+    The isolated context used by pkgconf-pypi keeps the modules it imports, so
+    resolving the entrypoint again there would not include the import time.
+    """
+    worker = pkgconf._path_entrypoints._Worker()
+    try:
+        # Start the worker beforehand, so that its start-up isn't included
+        with contextlib.suppress(Exception):
+            worker(pkgconf._path_entrypoints.module_paths, [])
+        return _timed(lambda: worker(pkgconf._path_entrypoints.module_path, original.value))
+    finally:
+        worker.close()
+
+
+def _strategy_timings(original: importlib.metadata.EntryPoint) -> dict[str, dict[str, Any]]:
+    """Resolve the entrypoint with each strategy, separately, without using any cached results."""
+    EntryPoint = pkgconf._path_entrypoints.EntryPoint
+    return {
+        'metadata': _timed(lambda: EntryPoint(original)._static_path),
+        'translation': _timed(lambda: EntryPoint(original)._verified_translation),
+        'import-system': _import_system_timing(original),
+    }
+
+
+def timings(strategy: str | None = None) -> dict[str, Any]:
+    """Measure the time spent calculating PKG_CONFIG_PATH, and running a pkgconf query.
+
+    Each entrypoint is resolved as pkgconf-pypi would, but without using any
+    cached results, and then with each of the available strategies. Times are in
+    seconds, and the distributions are sorted by the time spent resolving their
+    entrypoints, slowest first.
+
+    :param strategy: Path resolution strategy (see :func:`get_pkg_config_path`).
+    """
+    start = time.perf_counter()
+    executable = pkgconf.get_executable()
+    executable_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    original_eps = pkgconf._path_entrypoints.scan_entry_points('pkg_config')
+    scan_time = time.perf_counter() - start
+
+    # Start the isolated context beforehand, so that it isn't attributed to the first entrypoint
+    start = time.perf_counter()
     try:
+        pkgconf._path_entrypoints.run_in_isolated_context(pkgconf._path_entrypoints.module_paths, [])
+    except Exception:
+        pkgconf._LOGGER.exception('Failed to start the isolated context')
+    isolated_context_time = time.perf_counter() - start
+
+    entrypoints: list[dict[str, Any]] = []
+    for original in original_eps:
+        resolved = pkgconf._path_entrypoints.EntryPoint(original, strategy)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            resolution = resolved.resolution
+        entrypoints.append(
+            {
+                'name': resolved.name,
+                'value': resolved.value,
+                'distribution': original.dist.name if original.dist else None,
+                'version': original.dist.version if original.dist else None,
+                'path': resolution.path,
+                'strategy': resolution.strategy,
+                'time': resolution.duration,
+                'fallback': resolution.strategy == 'fallback',
+                'error': resolution.error,
+                'warnings': [str(warning.message) for warning in caught if issubclass(warning.category, pkgconf.PathWarning)],
+                'strategies': _strategy_timings(original),
+            }
+        )
+    entrypoints.sort(key=lambda entrypoint: entrypoint['name'])
+
+    strategies = {
+        name: sum(entrypoint['strategies'][name]['time'] for entrypoint in entrypoints)
+        for name in ('metadata', 'translation', 'import-system')
+    }
+    distributions: dict[str, dict[str, Any]] = {}
+    for entrypoint in entrypoints:
+        distribution = distributions.setdefault(
+            entrypoint['distribution'] or '', {'version': entrypoint['version'], 'time': 0.0, 'entrypoints': []}
+        )
+        distribution['time'] += entrypoint['time']
+        distribution['entrypoints'].append(entrypoint['name'])
+
+    # Run the query like pkgconf-pypi, but with the PKG_CONFIG_PATH calculated above, and without the query cache
+    env = pkgconf._pkgconf_env(os.environ, [entrypoint['path'] for entrypoint in entrypoints if entrypoint['path']])
+    start = time.perf_counter()
+    process = pkgconf._run_captured([os.fspath(executable), *REFERENCE_QUERY], env, cache=False)
+    query_time = time.perf_counter() - start
+
+    return {
+        'executable': os.fspath(executable),
+        'resolution_strategy': pkgconf._path_entrypoints.resolution_strategy(strategy),
+        'times': {
+            'executable': executable_time,
+            'scan': scan_time,
+            'isolated_context': isolated_context_time,
+            'entrypoints': sum(entrypoint['time'] for entrypoint in entrypoints),
+        },
+        'entrypoints': entrypoints,
+        'strategies': strategies,
+        'distributions': dict(sorted(distributions.items(), key=lambda item: item[1]['time'], reverse=True)),
+        'query': {'args': list(REFERENCE_QUERY), 'returncode': process.returncode, 'time': query_time},
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m pkgconf.diagnose')
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='resolve the entrypoints with every strategy, and print a JSON report of the time spent on each step',
+    )
+    args = parser.parse_args(argv)
+    if args.timings:
+        print(json.dumps(timings(), indent=2))
+    else:
         report()
+
+
+if __name__ == '__main__':
+    try:
+        main()
     except (KeyboardInterrupt, BrokenPipeError):  # pragma: no cover
         pass
@@ -1,6 +1,8 @@
+import importlib.metadata
 import os
 import pathlib
 import sys
+import textwrap
 
 import environment_helpers
 import environment_helpers.build
@@ -32,6 +34,15 @@ def examples():
     return ROOT / 'examples'
 
 
+@pytest.fixture
+def synthetic_env(monkeypatch):
+    """The benchmark synthetic environment generator module."""
+    monkeypatch.syspath_prepend(os.fspath(ROOT / 'benchmarks'))
+    import synthetic_env
+
+    return synthetic_env
+
+
 @pytest.fixture(scope='session')
 def self_wheel(tmp_path_factory):
     tmpdir = tmp_path_factory.mktemp('wheel')
@@ -52,11 +63,75 @@ def env(tmpdir, self_wheel):
     return env
 
 
+@pytest.fixture
+def site_dir(tmp_path, monkeypatch):
+    """Directory in sys.path, where make_dist installs its distributions."""
+    path = tmp_path / 'site-packages'
+    path.mkdir()
+    monkeypatch.syspath_prepend(os.fspath(path))
+    return path
+
+
+@pytest.fixture
+def make_dist(site_dir):
+    """Install a minimal fake distribution in site_dir.
+
+    :param pkg_config: Mapping of pkg_config entrypoint names to values.
+    :param files: Files to create, relative to site_dir, and recorded in RECORD.
+    """
+
+    def make_dist(name, version='1.0.0', pkg_config=None, files=()):
+        for file in files:
+            site_dir.joinpath(file).parent.mkdir(parents=True, exist_ok=True)
+            site_dir.joinpath(file).touch()
+        dist_info = site_dir / f'{name}-{version}.dist-info'
+        dist_info.mkdir()
+        dist_info.joinpath('METADATA').write_text(f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n')
+        if pkg_config:
+            entries = ''.join(f'{key} = {value}\n' for key, value in pkg_config.items())
+            dist_info.joinpath('entry_points.txt').write_text(f'[pkg_config]\n{entries}')
+        records = [*files, *(f'{dist_info.name}/{item.name}' for item in dist_info.iterdir()), f'{dist_info.name}/RECORD']
+        dist_info.joinpath('RECORD').write_text(''.join(f'{record},,\n' for record in records))
+        return importlib.metadata.PathDistribution(dist_info)
+
+    return make_dist
+
+
+@pytest.fixture
+def fake_pkgconf(tmp_path, mocker):
+    """pkgconf executable that prints its arguments, and records its calls."""
+    if os.name != 'posix':
+        pytest.skip('fake pkgconf executable requires a POSIX system')
+    calls = tmp_path / 'calls'
+    executable = tmp_path / 'pkgconf'
+    executable.write_text(
+        textwrap.dedent(f"""
+            #!{sys.executable}
+            import os, sys
+            if sys.argv[1:] == ['--variable=pc_path', 'pkg-config']:
+                print(os.environ.get('FAKE_PKGCONF_PC_PATH', ''))
+                sys.exit()
+            with open({os.fspath(calls)!r}, 'a') as f:
+                f.write('x')
+            print(' '.join(sys.argv[1:]), os.environ['PKG_CONFIG_PATH'])
+        """).lstrip()
+    )
+    executable.chmod(0o755)
+    mocker.patch('pkgconf.get_executable', return_value=executable)
+    mocker.patch('pkgconf.get_pkg_config_path', return_value=['/foo'])
+    return calls
+
+
 @pytest.fixture(autouse=True)
 def unset_pkg_config_path(monkeypatch):
     monkeypatch.delenv('PKG_CONFIG_PATH', raising=False)
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(monkeypatch, tmp_path_factory):
+    monkeypatch.setenv('PKGCONF_PYPI_CACHE_DIR', os.fspath(tmp_path_factory.mktemp('cache')))
+
+
 @pytest.fixture(autouse=True)
 def reset_recursive_flag():
     yield
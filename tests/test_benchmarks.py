@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+
+
+def test_synthetic_env(synthetic_env, tmp_path):
+    env_path = tmp_path / 'env'
+    site = synthetic_env.create(env_path, distributions=10, pkg_config=8, chain=4)
+    python = env_path / ('Scripts/python.exe' if os.name == 'nt' else 'bin/python')
+
+    code = 'import json, pkgconf; print(json.dumps(pkgconf.get_pkg_config_path()))'
+    env = dict(os.environ, PKGCONF_PYPI_CACHE_DIR=os.fspath(tmp_path / 'cache'))
+    output = subprocess.run([python, '-c', code], env=env, check=True, capture_output=True, text=True).stdout
+    paths = json.loads(output)
+
+    assert len(paths) == 8
+    for index, path in enumerate(paths):
+        assert os.path.isfile(os.path.join(path, f'lib{index}.pc'))
+        base = env_path / 'src' if synthetic_env.kind(index) == 'editable' else site
+        assert os.path.commonpath([path, base]) == os.fspath(base)
+    with open(os.path.join(paths[7], 'lib7.pc')) as f:
+        assert 'Requires: lib6\n' in f.read()
+    with open(os.path.join(paths[4], 'lib4.pc')) as f:
+        assert 'Requires: \n' in f.read()
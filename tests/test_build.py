@@ -0,0 +1,19 @@
+import json
+
+import pytest
+
+import pkgconf.build
+
+
+def test_write_metadata(tmp_path):
+    paths = pkgconf.build.pkg_config_paths({'foo': 'foo.pkgconf', 'bar': 'bar'})
+    file = pkgconf.build.write_metadata(tmp_path, paths)
+
+    assert file == tmp_path / 'pkg_config_paths.json'
+    assert json.loads(file.read_text()) == {'foo': 'foo/pkgconf', 'bar': 'bar'}
+
+
+@pytest.mark.parametrize('path', ['/foo/pkgconf', 'foo\\pkgconf'])
+def test_write_metadata_invalid_path(tmp_path, path):
+    with pytest.raises(ValueError, match='must be a relative POSIX path'):
+        pkgconf.build.write_metadata(tmp_path, {'foo': path})
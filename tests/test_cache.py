@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+import time
+
+import pkgconf
+import pkgconf._cache
+
+
+class FakeEntryPoint:
+    def __init__(self, path):
+        self.path = path
+
+
+def test_fingerprint_changes_on_install(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'path', [str(tmp_path)])
+
+    before = pkgconf._cache.environment_fingerprint()
+    assert pkgconf._cache.environment_fingerprint() == before
+
+    tmp_path.joinpath('foo-1.0.0.dist-info').mkdir()
+    installed = pkgconf._cache.environment_fingerprint()
+    assert installed != before
+
+    tmp_path.joinpath('foo-1.0.0.dist-info').rmdir()
+    assert pkgconf._cache.environment_fingerprint() == before
+
+
+def test_get_pkg_config_path_cached(mocker, monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'path', [str(tmp_path)])
+    entry_points = mocker.patch('pkgconf._entry_points', return_value=[FakeEntryPoint('/foo')])
+
+    assert pkgconf.get_pkg_config_path() == ['/foo']
+    assert pkgconf.get_pkg_config_path() == ['/foo']
+    assert entry_points.call_count == 1
+
+    # Installing a new distribution invalidates the cache
+    entry_points.return_value = [FakeEntryPoint('/foo'), FakeEntryPoint('/bar')]
+    tmp_path.joinpath('bar-1.0.0.dist-info').mkdir()
+    assert pkgconf.get_pkg_config_path() == ['/foo', '/bar']
+    assert entry_points.call_count == 2
+
+
+def test_get_pkg_config_path_cached_strategy(mocker, monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'path', [str(tmp_path)])
+    entry_points = mocker.patch('pkgconf._entry_points', return_value=[FakeEntryPoint('/foo')])
+
+    assert pkgconf.get_pkg_config_path() == ['/foo']
+    assert pkgconf.get_pkg_config_path('import-system') == ['/foo']
+    assert entry_points.call_count == 1
+
+    # Paths resolved with another strategy aren't reused
+    assert pkgconf.get_pkg_config_path('translation-first') == ['/foo']
+    assert entry_points.call_count == 2
+    monkeypatch.setenv('PKGCONF_PYPI_RESOLUTION_STRATEGY', 'translation-first')
+    assert pkgconf.get_pkg_config_path() == ['/foo']
+    assert entry_points.call_count == 2
+
+
+def test_get_pkg_config_path_no_cache(mocker, monkeypatch):
+    monkeypatch.setenv('PKGCONF_PYPI_NO_CACHE', '1')
+    entry_points = mocker.patch('pkgconf._entry_points', return_value=[FakeEntryPoint('/foo')])
+
+    assert pkgconf.get_pkg_config_path() == ['/foo']
+    assert pkgconf.get_pkg_config_path() == ['/foo']
+    assert entry_points.call_count == 2
+
+
+def test_run_pkgconf_cached(fake_pkgconf, tmp_path, monkeypatch):
+    search_dir = tmp_path / 'pkgconfig'
+    search_dir.mkdir()
+    monkeypatch.setenv('PKG_CONFIG_PATH', os.fspath(search_dir))
+
+    for _ in range(2):
+        process = pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True, text=True)
+        assert process.stdout == f'--cflags foo {search_dir}{os.pathsep}/foo\n'
+    assert fake_pkgconf.read_text() == 'x'
+
+    # Changing the .pc files invalidates the cached results
+    search_dir.joinpath('foo.pc').touch()
+    pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True)
+    assert fake_pkgconf.read_text() == 'xx'
+
+    # Uncaptured and uncached calls always run pkgconf
+    pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True, cache=False)
+    pkgconf.run_pkgconf('--cflags', 'foo', '--no-cache', capture_output=True)
+    pkgconf.run_pkgconf('--cflags', 'foo', stdout=subprocess.DEVNULL)
+    assert fake_pkgconf.read_text() == 'xxxxx'
+
+
+def test_run_pkgconf_cached_default_search_dirs(fake_pkgconf, tmp_path, monkeypatch):
+    default_dir = tmp_path / 'default'
+    default_dir.mkdir()
+    monkeypatch.setenv('FAKE_PKGCONF_PC_PATH', os.fspath(default_dir))
+
+    for _ in range(2):
+        pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True)
+    assert fake_pkgconf.read_text() == 'x'
+
+    # Changing the .pc files in the built-in search path invalidates the cached results
+    default_dir.joinpath('foo.pc').touch()
+    pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True)
+    assert fake_pkgconf.read_text() == 'xx'
+
+    # Unless PKG_CONFIG_LIBDIR replaces it
+    monkeypatch.setenv('PKG_CONFIG_LIBDIR', os.fspath(tmp_path / 'libdir'))
+    pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True)
+    default_dir.joinpath('bar.pc').touch()
+    pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True)
+    assert fake_pkgconf.read_text() == 'xxx'
+
+
+def test_query_cache_eviction(monkeypatch):
+    monkeypatch.setenv('PKGCONF_PYPI_QUERY_CACHE_SIZE', '2')
+
+    for key in ('a', 'b', 'c'):
+        pkgconf._cache.store_query(key, 'signature', (0, key.encode(), b''))
+        time.sleep(0.01)
+
+    assert pkgconf._cache.load_query('a', 'signature') is None
+    assert pkgconf._cache.load_query('b', 'signature') == (0, b'b', b'')
+    assert pkgconf._cache.load_query('c', 'other-signature') is None
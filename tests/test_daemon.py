@@ -0,0 +1,87 @@
+import os
+import socket
+import threading
+
+import pytest
+
+import pkgconf
+import pkgconf._daemon
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='AF_UNIX sockets not available')
+
+
+@pytest.fixture
+def daemon(tmp_path, mocker):
+    tmp_path.joinpath('daemon').mkdir(mode=0o700)
+    path = os.fspath(tmp_path / 'daemon' / 'daemon.sock')
+    mocker.patch('pkgconf._daemon.socket_path', return_value=path)
+    server = pkgconf._daemon._server(path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_forward(daemon, fake_pkgconf, capsysbinary):
+    assert pkgconf._daemon.forward(['--cflags', 'foo']) == 0
+    assert capsysbinary.readouterr().out == b'--cflags foo :/foo\n'
+
+    # The result is reused
+    assert pkgconf._daemon.forward(['--cflags', 'foo']) == 0
+    assert capsysbinary.readouterr().out == b'--cflags foo :/foo\n'
+    assert fake_pkgconf.read_text() == 'x'
+
+
+def test_forward_no_daemon(tmp_path, mocker):
+    mocker.patch('pkgconf._daemon.socket_path', return_value=os.fspath(tmp_path / 'daemon.sock'))
+
+    assert pkgconf._daemon.forward(['--cflags', 'foo']) is None
+
+
+def test_forward_timeout(tmp_path, mocker, monkeypatch):
+    tmp_path.joinpath('daemon').mkdir(mode=0o700)
+    path = os.fspath(tmp_path / 'daemon' / 'daemon.sock')
+    mocker.patch('pkgconf._daemon.socket_path', return_value=path)
+    monkeypatch.setattr(pkgconf._daemon, '_CLIENT_TIMEOUT', 0.1)
+
+    # Accepts connections, but never replies
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        sock.listen()
+        assert pkgconf._daemon.forward(['--cflags', 'foo']) is None
+
+
+def test_forward_env(daemon, fake_pkgconf, mocker, monkeypatch, capsysbinary):
+    monkeypatch.setenv('SECRET_TOKEN', 'secret')
+    monkeypatch.setenv('PKG_CONFIG_PATH', '/bar')
+    query = mocker.spy(pkgconf._daemon.Daemon, 'query')
+
+    assert pkgconf._daemon.forward(['--cflags', 'foo']) == 0
+
+    env = query.call_args.args[2]
+    assert env['PKG_CONFIG_PATH'] == '/bar'
+    assert env['PATH'] == os.environ['PATH']
+    assert 'SECRET_TOKEN' not in env
+
+
+def test_forward_not_private(daemon, mocker):
+    directory = os.path.dirname(pkgconf._daemon.socket_path())
+    os.chmod(directory, 0o755)
+    query = mocker.spy(pkgconf._daemon.Daemon, 'query')
+
+    assert pkgconf._daemon.forward(['--cflags', 'foo']) is None
+    query.assert_not_called()
+
+
+def test_serve_fixes_mode(tmp_path, mocker):
+    directory = tmp_path / 'daemon'
+    directory.mkdir(mode=0o755)
+    mocker.patch('pkgconf._daemon._server', side_effect=KeyboardInterrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        pkgconf._daemon.serve(os.fspath(directory / 'daemon.sock'))
+
+    assert directory.stat().st_mode & 0o777 == 0o700
@@ -1,9 +1,14 @@
+import json
 import os
 import re
+import shutil
 import textwrap
 
 import pytest
 
+import pkgconf
+import pkgconf.diagnose
+
 
 @pytest.mark.skipif(os.name == 'nt', reason='meson-python does not support bundling libraries in wheel on win32')
 def test_diagnose(env, packages):
@@ -16,12 +21,64 @@ def test_diagnose(env, packages):
         pkgconf executable: .*{os.path.sep}pkgconf
         entrypoints:
           namespace:
-            value: namespace
-             path: .*{os.path.sep}namespace
+               value: namespace
+                path: .*{os.path.sep}namespace
+            strategy: import-system
+                time: .*ms
           register-pkg-config-path:
-            value: register_pkg_config_path.pkgconf
-             path: .*{os.path.sep}register_pkg_config_path{os.path.sep}pkgconf
+               value: register_pkg_config_path.pkgconf
+                path: .*{os.path.sep}register_pkg_config_path{os.path.sep}pkgconf
+            strategy: import-system
+                time: .*ms
         PKG_CONFIG_PATH: .*{os.path.sep}namespace:.*{os.path.sep}register_pkg_config_path{os.path.sep}pkgconf
     """).strip()
 
     assert re.match(expected, output), output
+
+
+def test_timings(fake_pkgconf, make_dist, site_dir, capsys):
+    make_dist('foo', pkg_config={'foo': 'foo'}, files=['foo/__init__.py', 'foo/foo.pc'])
+    make_dist('bar', pkg_config={'bar': 'bar_missing'})
+
+    pkgconf.diagnose.main(['--timings'])
+
+    report = json.loads(capsys.readouterr().out)
+    assert report['executable'] == os.fspath(pkgconf.get_executable())
+    assert report['resolution_strategy'] == 'import-system'
+    assert set(report['times']) == {'executable', 'scan', 'isolated_context', 'entrypoints'}
+    assert set(report['strategies']) == {'metadata', 'translation', 'import-system'}
+
+    bar, foo = report['entrypoints']
+    assert foo['path'] == os.fspath(site_dir / 'foo')
+    assert foo['strategy'] == 'import-system'
+    assert not foo['fallback'] and not foo['warnings']
+    assert foo['strategies']['translation']['path'] == os.fspath(site_dir / 'foo')
+    assert foo['strategies']['metadata']['path'] is None
+    assert bar['fallback']
+    assert bar['warnings'] == ['Failed to resolve the entrypoint path via the import system (see log for details)']
+    assert bar['strategies']['import-system']['error'].startswith('ModuleNotFoundError')
+
+    assert list(report['distributions']) in (['foo', 'bar'], ['bar', 'foo'])
+    assert report['distributions']['foo']['entrypoints'] == ['foo']
+    assert report['query'] == {
+        'args': list(pkgconf.diagnose.REFERENCE_QUERY),
+        'returncode': 0,
+        'time': report['query']['time'],
+    }
+
+
+def test_timings_import_system_uncached(make_dist, site_dir):
+    """Test that the import-system timing doesn't reuse the modules imported by the entrypoint resolution."""
+    dist = make_dist('foo', pkg_config={'foo': 'foo.pkgconf'}, files=['foo/__init__.py', 'foo/pkgconf/foo.pc'])
+    [original] = dist.entry_points
+    # Start a new isolated context, with site_dir in its sys.path, and resolve the entrypoint there
+    pkgconf._path_entrypoints._cleanup_isolated_contexts()
+    path = os.fspath(site_dir / 'foo' / 'pkgconf')
+    assert pkgconf._path_entrypoints.EntryPoint(original)._resolve_via_import_system() == path
+
+    # The isolated context still has the module, but a new one doesn't find it
+    shutil.rmtree(site_dir / 'foo')
+    assert pkgconf._path_entrypoints.run_in_isolated_context(pkgconf._path_entrypoints.module_path, 'foo.pkgconf') == path
+    timing = pkgconf.diagnose._strategy_timings(original)['import-system']
+    assert timing['path'] is None
+    assert timing['error'].startswith('ModuleNotFoundError')
@@ -1,7 +1,11 @@
+import io
+import json
 import os
+import pathlib
 import re
 import subprocess
 import sys
+import sysconfig
 
 import pytest
 
@@ -19,18 +23,17 @@ def test_entries(env, name):
 def test_pkgconf_pypi_fallback(mocker, monkeypatch):
     """Test that we fallback to the system pkgconf if ours fails."""
     mocker.patch('pkgconf.run_pkgconf', side_effect=subprocess.CalledProcessError(1, '(cmd)'))
-    mocker.patch('subprocess.run', return_value=subprocess.CompletedProcess(['(cmd)'], 0))
-    mocker.patch('sys.exit')
+    mocker.patch('pkgconf.__main__._exec', side_effect=SystemExit(0))
 
     mocker.patch('shutil.which', return_value='(pkgconf-path)')
 
     args = ['--libs', 'py-test-inexistent']
     monkeypatch.setattr(sys, 'argv', ['(argv0)', *args])
 
-    pkgconf.__main__.main()
+    with pytest.raises(SystemExit):
+        pkgconf.__main__.main()
 
-    subprocess.run.assert_called_with(['(pkgconf-path)', *args])
-    sys.exit.assert_called_with(0)
+    pkgconf.__main__._exec.assert_called_once_with(['(pkgconf-path)', *args])
 
 
 def test_pkgconf_pypi_no_fallback(mocker, monkeypatch):
@@ -50,18 +53,130 @@ def test_pkgconf_pypi_no_fallback(mocker, monkeypatch):
 
 
 def test_pkgconf_pypi_venv_redirect(mocker, monkeypatch):
-    mocker.patch('subprocess.run', return_value=subprocess.CompletedProcess(['(cmd)'], 0))
-    mocker.patch('sys.exit')
+    mocker.patch('pkgconf.__main__._exec', side_effect=SystemExit(0))
 
     monkeypatch.setenv('VIRTUAL_ENV', '(venv)')
 
     args = ['--libs', 'py-test-inexistent']
     monkeypatch.setattr(sys, 'argv', ['(argv0)', *args])
 
+    with pytest.raises(SystemExit):
+        pkgconf.__main__._python_aware_entrypoint()
+
+    assert pkgconf.__main__._exec.call_args.args[0][1:] == ['-m', 'pkgconf', *args]
+
+
+@pytest.mark.parametrize(
+    ('args', 'no_cache'),
+    [
+        (['--libs', 'py-test-inexistent', '--no-cache'], False),
+        (['--libs', 'py-test-inexistent'], True),
+    ],
+)
+def test_pkgconf_pypi_exec(mocker, monkeypatch, args, no_cache):
+    """Test that we hand the process over to our pkgconf if there's nothing to do after it exits."""
+    mocker.patch('pkgconf._get_system_executable', return_value=None)
+    mocker.patch('pkgconf._pkgconf_command', return_value=(['(pkgconf-path)', '(args)'], {'(env)': ''}))
+    mocker.patch('pkgconf.__main__._exec', side_effect=SystemExit(0))
+    if no_cache:
+        monkeypatch.setenv('PKGCONF_PYPI_NO_CACHE', '1')
+    monkeypatch.setattr(sys, 'argv', ['(argv0)', *args])
+
+    with pytest.raises(SystemExit):
+        pkgconf.__main__.main()
+
+    pkgconf._pkgconf_command.assert_called_once_with(args, None)
+    pkgconf.__main__._exec.assert_called_once_with(['(pkgconf-path)', '(args)'], {'(env)': ''})
+
+
+def test_vanilla_exec(mocker, monkeypatch):
+    mocker.patch('pkgconf._executable_path', return_value='(pkgconf-path)')
+    mocker.patch('pkgconf.__main__._exec', side_effect=SystemExit(0))
+    monkeypatch.setenv('PKG_CONFIG_PATH', '(path)')
+    monkeypatch.setattr(sys, 'argv', ['(argv0)', '--libs', 'foo'])
+
+    with pytest.raises(SystemExit):
+        pkgconf.__main__._vanilla_entrypoint()
+
+    pkgconf.__main__._exec.assert_called_once_with(['(pkgconf-path)', '--libs', 'foo'])
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='the process is only replaced on POSIX')
+def test_exec(root):
+    child = 'import os; print(os.getpid()); exit(3)'
+    code = f'import pkgconf.__main__, sys; pkgconf.__main__._exec([sys.executable, "-c", {child!r}])'
+    env = dict(os.environ, PYTHONPATH=os.fspath(root / 'src'))
+    process = subprocess.Popen([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, text=True)
+    stdout, _ = process.communicate()
+
+    assert int(stdout) == process.pid
+    assert process.returncode == 3
+
+
+def test_exec_no_exec(mocker, monkeypatch):
+    mocker.patch('subprocess.run', return_value=subprocess.CompletedProcess(['(cmd)'], 3))
+    monkeypatch.setenv('PKGCONF_PYPI_NO_EXEC', '1')
+
+    with pytest.raises(SystemExit) as excinfo:
+        pkgconf.__main__._exec(['(cmd)'])
+
+    assert excinfo.value.code == 3
+    subprocess.run.assert_called_once_with(['(cmd)'], env=None)
+
+
+@pytest.fixture
+def stacked_venv(tmp_path, monkeypatch):
+    """Virtual environment stacked on top of the current one, with a distribution registering a pkg-config path."""
+    venv = tmp_path / 'venv'
+    venv.mkdir()
+    base_executable = getattr(sys, '_base_executable', sys.executable)
+    venv.joinpath('pyvenv.cfg').write_text(
+        f'home = {os.path.dirname(base_executable)}\n'
+        'include-system-site-packages = true\n'
+        f'version = {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}\n'
+    )
+    monkeypatch.setattr(sys, 'base_prefix', sys.prefix)
+    monkeypatch.setenv('VIRTUAL_ENV', os.fspath(venv))
+
+    venv_vars = sysconfig.get_config_vars().copy()
+    venv_vars['base'] = venv_vars['platbase'] = os.fspath(venv)
+    purelib = pathlib.Path(pkgconf.__main__._venv_paths(venv_vars)['purelib'])
+    purelib.joinpath('venv_project', 'pkgconfig').mkdir(parents=True)
+    purelib.joinpath('venv_project', '__init__.py').touch()
+    purelib.joinpath('venv_project', 'pkgconfig', '__init__.py').touch()
+    dist_info = purelib / 'venv_project-1.0.0.dist-info'
+    dist_info.mkdir()
+    dist_info.joinpath('METADATA').write_text('Metadata-Version: 2.1\nName: venv-project\nVersion: 1.0.0\n')
+    dist_info.joinpath('entry_points.txt').write_text('[pkg_config]\nvenv-project = venv_project.pkgconfig\n')
+    dist_info.joinpath('RECORD').write_text('venv_project/__init__.py,,\nvenv_project/pkgconfig/__init__.py,,\n')
+    return purelib
+
+
+def test_pkgconf_pypi_stacked_venv(mocker, monkeypatch, stacked_venv):
+    """Test that the stacked venv entrypoints are resolved without running its interpreter."""
+    mocker.patch('pkgconf.__main__._exec')
+    mocker.patch('pkgconf.__main__.main')
+    monkeypatch.setattr(sys, 'argv', ['(argv0)', '--libs', 'py-test-inexistent'])
+
     pkgconf.__main__._python_aware_entrypoint()
 
-    assert subprocess.run.call_args.args[0][1:] == ['-m', 'pkgconf', *args]
-    sys.exit.assert_called_with(0)
+    pkgconf.__main__._exec.assert_not_called()
+    pkgconf.__main__.main.assert_called_once_with([os.fspath(stacked_venv / 'venv_project' / 'pkgconfig')])
+
+
+def test_pkgconf_pypi_stacked_venv_unverified(mocker, monkeypatch, stacked_venv):
+    """Test that we run the venv interpreter if the entrypoints can't be resolved by translation."""
+    mocker.patch('pkgconf.__main__._exec', side_effect=SystemExit(0))
+    mocker.patch('pkgconf.__main__.main')
+    monkeypatch.setattr(sys, 'argv', ['(argv0)', '--libs', 'py-test-inexistent'])
+    # Eg. editable installs don't have the package in the RECORD
+    next(stacked_venv.glob('*.dist-info')).joinpath('RECORD').write_text('')
+
+    with pytest.raises(SystemExit):
+        pkgconf.__main__._python_aware_entrypoint()
+
+    pkgconf.__main__.main.assert_not_called()
+    assert pkgconf.__main__._exec.call_args.args[0][1:] == ['-m', 'pkgconf', '--libs', 'py-test-inexistent']
 
 
 def test_pkgconf_pypi_venv_system_site_packages(container):
@@ -124,3 +239,56 @@ def test_vanilla_force(env, packages):
     )
     assert p.returncode == 0
     assert p.stdout.startswith('-I')
+
+
+def test_batch(fake_pkgconf, mocker, monkeypatch, capsys):
+    mocker.patch('pkgconf._get_system_executable', return_value=None)
+    queries = [['--cflags', f'foo{i}'] for i in range(10)]
+    lines = [json.dumps(query) for query in queries]
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('\n'.join([*lines[:5], '', '"invalid"', *lines[5:]]) + '\n'))
+
+    assert pkgconf.__main__._batch(max_workers=4) == 0
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records[5] == {'error': 'Invalid query: expected a JSON array of strings'}
+    del records[5]
+    assert [record['args'] for record in records] == queries
+    assert [record['stdout'].split()[:2] for record in records] == queries
+    assert all(record['returncode'] == 0 for record in records)
+    assert pkgconf.get_pkg_config_path.call_count == 1
+
+
+def test_batch_query_error(fake_pkgconf, mocker, monkeypatch, capsys):
+    mocker.patch('pkgconf._get_system_executable', return_value=None)
+    mocker.patch(
+        'pkgconf.Session.query', side_effect=[OSError('no pkgconf'), pkgconf.QueryResult(('--libs', 'bar'), 0, 'ok\n', '')]
+    )
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('["--libs", "foo"]\n["--libs", "bar"]\n'))
+
+    assert pkgconf.__main__._batch(max_workers=1) == 0
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records == [
+        {'args': ['--libs', 'foo'], 'error': 'Query failed: no pkgconf'},
+        {'args': ['--libs', 'bar'], 'returncode': 0, 'stdout': 'ok\n', 'stderr': ''},
+    ]
+
+
+@pytest.mark.parametrize('returncode', [0, 1])
+def test_speculative(tmp_path, mocker, monkeypatch, capsysbinary, returncode):
+    if os.name != 'posix':
+        pytest.skip('fake system pkgconf executable requires a POSIX system')
+    system_executable = tmp_path / 'pkg-config'
+    system_executable.write_text(f'#!{sys.executable}\nprint("system")\n')
+    system_executable.chmod(0o755)
+    mocker.patch('pkgconf._get_system_executable', return_value=system_executable)
+    mocker.patch('pkgconf.run_pkgconf', return_value=subprocess.CompletedProcess(['(cmd)'], returncode, b'bundled\n', b''))
+    monkeypatch.setenv('PKGCONF_PYPI_SPECULATIVE', '1')
+    monkeypatch.setattr(sys, 'argv', ['(argv0)', '--libs', 'foo'])
+
+    with pytest.raises(SystemExit) as excinfo:
+        pkgconf.__main__.main()
+
+    assert excinfo.value.code == 0
+    expected = b'bundled\n' if returncode == 0 else b'system\n'
+    assert capsysbinary.readouterr().out == expected
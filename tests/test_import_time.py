@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+# Modules each entrypoint may import, on top of the ones imported by the interpreter start-up
+VANILLA_BUDGET = {'__future__', 'warnings', 'pkgconf', 'pkgconf.__main__'}
+
+# Modules that pkgconf-pypi must not import when the PKG_CONFIG_PATH is cached
+WARM_EXCLUDED = {'asyncio', 'concurrent.futures', 'importlib.metadata', 'pickle', 'pkgconf._path_entrypoints', 'socketserver'}
+
+_ENTRYPOINT_CODE = """\
+import sys
+sys.argv[1:] = ['--exists', 'pkgconf-pypi-import-time-test']
+from pkgconf.__main__ import {entrypoint}
+{entrypoint}()
+"""
+
+
+def imported_modules(root, code):
+    """Get the modules imported by running ``code`` in a new interpreter, according to -X importtime."""
+    env = dict(os.environ, PYTHONPATH=os.fspath(root / 'src'))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], env=env, capture_output=True, text=True, check=False
+    )
+    return {
+        line.rpartition('|')[2].strip()
+        for line in process.stderr.splitlines()
+        if line.startswith('import time:') and not line.endswith('| package')
+    }
+
+
+@pytest.fixture
+def startup_modules(root):
+    return imported_modules(root, 'pass')
+
+
+@pytest.mark.parametrize('code', ['import pkgconf', 'import pkgconf.__main__'])
+def test_import_budget(root, startup_modules, code):
+    assert imported_modules(root, code) - startup_modules <= VANILLA_BUDGET
+
+
+def test_vanilla_entrypoint_budget(root, startup_modules):
+    modules = imported_modules(root, _ENTRYPOINT_CODE.format(entrypoint='_vanilla_entrypoint'))
+    assert modules - startup_modules <= VANILLA_BUDGET
+
+
+def test_python_aware_entrypoint_warm(monkeypatch, root, startup_modules):
+    monkeypatch.setenv('PKGCONF_PYPI_NO_DAEMON', '1')
+    code = _ENTRYPOINT_CODE.format(entrypoint='_python_aware_entrypoint')
+    cold = imported_modules(root, code)
+    assert 'pkgconf._path_entrypoints' in cold
+
+    warm = imported_modules(root, code)
+    assert not (warm - startup_modules) & WARM_EXCLUDED
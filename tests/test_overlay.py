@@ -0,0 +1,56 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import pkgconf
+import pkgconf._overlay
+
+
+PC_TEMPLATE = (
+    'prefix=${{pcfiledir}}/..\nName: {name}\nDescription: {name}\nVersion: {version}\nCflags: -I${{prefix}}/include\n'
+)
+
+
+@pytest.fixture
+def pc_dirs(tmp_path):
+    dirs = []
+    for index, names in enumerate([('foo', 'bar'), ('foo', 'baz')]):
+        directory = tmp_path / f'dist{index}' / 'pkgconf'
+        directory.mkdir(parents=True)
+        for name in names:
+            directory.joinpath(f'{name}.pc').write_text(PC_TEMPLATE.format(name=name, version=index))
+        dirs.append(os.fspath(directory))
+    return dirs
+
+
+def test_overlay_dir(pc_dirs):
+    overlay = pkgconf._overlay.overlay_dir(pc_dirs)
+
+    assert sorted(os.listdir(overlay)) == ['bar.pc', 'baz.pc', 'foo.pc']
+    # The first directory wins
+    with open(os.path.join(overlay, 'foo.pc')) as f:
+        assert f.read() == f'pcfiledir={pc_dirs[0]}\n' + PC_TEMPLATE.format(name='foo', version=0)
+    # Reused while the .pc files don't change
+    assert pkgconf._overlay.overlay_dir(pc_dirs) == overlay
+
+    os.utime(os.path.join(pc_dirs[1], 'baz.pc'), ns=(0, 0))
+    assert pkgconf._overlay.overlay_dir(pc_dirs) != overlay
+
+
+def test_overlay_dir_unsafe_path(tmp_path):
+    assert pkgconf._overlay.overlay_dir([os.fspath(tmp_path / 'with space')]) is None
+
+
+@pytest.mark.skipif(not shutil.which('pkgconf'), reason='pkgconf is not available')
+def test_overlay_pcfiledir(monkeypatch, pc_dirs):
+    monkeypatch.setenv('PKGCONF_PYPI_OVERLAY', '1')
+    if not pkgconf._overlay.enabled():
+        pytest.skip('the overlay is only available on POSIX systems')
+
+    env = pkgconf._pkgconf_env(os.environ, pc_dirs)
+    assert [path for path in env['PKG_CONFIG_PATH'].split(os.pathsep) if path] == [pkgconf._overlay.overlay_dir(pc_dirs)]
+
+    process = subprocess.run(['pkgconf', '--cflags', 'foo', 'baz'], env=env, capture_output=True, text=True, check=True)
+    assert process.stdout.split() == [f'-I{pc_dirs[0]}/../include', f'-I{pc_dirs[1]}/../include']
@@ -1,8 +1,16 @@
+import concurrent.futures
+import importlib.metadata
+import json
+import operator
+import os
+import shutil
 import sys
+import time
 
 import pytest
 
 import pkgconf._path_entrypoints
+import pkgconf.build
 
 
 def test_cleanup_isolated_contexts_closes_subinterpreter():
@@ -14,3 +22,320 @@ def test_cleanup_isolated_contexts_closes_subinterpreter():
     pkgconf._path_entrypoints._cleanup_isolated_contexts()
 
     assert pkgconf._path_entrypoints._subinterpreter is None
+
+
+def test_warm_isolated_context_no_entry_points(mocker):
+    warm = mocker.patch('pkgconf._path_entrypoints.warm_isolated_context')
+
+    assert pkgconf._path_entrypoints.entry_points(group='pkgconf_test_empty') == []
+    warm.assert_called_once()
+
+    # The empty state is stored, so the isolated context isn't started again for nothing
+    assert pkgconf._path_entrypoints.entry_points(group='pkgconf_test_empty') == []
+    warm.assert_called_once()
+
+
+def test_module_paths():
+    with pkgconf._path_entrypoints.replace_sys_modules():
+        results = pkgconf._path_entrypoints.module_paths(['json', 'pkgconf-test-inexistent'])
+
+    assert results[0] == (True, os.path.dirname(json.__file__))
+    assert results[1] == (False, "ModuleNotFoundError: No module named 'pkgconf-test-inexistent'")
+
+
+def test_entry_points_batched(mocker, monkeypatch):
+    monkeypatch.setenv('PKGCONF_PYPI_MAX_WORKERS', '1')
+    original_eps = [
+        importlib.metadata.EntryPoint('foo', 'foo', 'pkg_config'),
+        importlib.metadata.EntryPoint('bar', 'bar.pkgconf', 'pkg_config'),
+    ]
+    mocker.patch('pkgconf._path_entrypoints.scan_entry_points', return_value=original_eps)
+    run = mocker.patch(
+        'pkgconf._path_entrypoints.run_in_isolated_context',
+        return_value=[(True, '/foo'), (True, '/bar/pkgconf')],
+    )
+
+    eps = pkgconf._path_entrypoints.entry_points(group='pkg_config')
+
+    assert [(ep.name, ep.path) for ep in eps] == [('bar', '/bar/pkgconf'), ('foo', '/foo')]
+    run.assert_called_once_with(pkgconf._path_entrypoints.module_paths, ['foo', 'bar.pkgconf'])
+
+
+def test_entry_points_default_batch(mocker, monkeypatch):
+    """Test that, by default, all the entrypoints are resolved in a single round trip, regardless of the CPU count."""
+    monkeypatch.delenv('PKGCONF_PYPI_MAX_WORKERS', raising=False)
+    mocker.patch('os.cpu_count', return_value=8)
+    original_eps = [importlib.metadata.EntryPoint(f'ep{i}', f'ep{i}', 'pkg_config') for i in range(32)]
+    mocker.patch('pkgconf._path_entrypoints.scan_entry_points', return_value=original_eps)
+    run = mocker.patch(
+        'pkgconf._path_entrypoints.run_in_isolated_context',
+        side_effect=lambda fn, names: [(True, f'/{name}') for name in names],
+    )
+    contexts = mocker.patch('pkgconf._path_entrypoints.isolated_contexts')
+
+    eps = pkgconf._path_entrypoints.entry_points(group='pkg_config')
+
+    assert len(eps) == 32
+    run.assert_called_once()
+    contexts.assert_not_called()
+
+
+def test_entry_points_parallel(mocker):
+    mocker.patch('pkgconf._path_entrypoints._MIN_ENTRYPOINTS_PER_CONTEXT', 2)
+    original_eps = [importlib.metadata.EntryPoint(name, name, 'pkg_config') for name in ('a', 'b', 'c', 'd', 'e')]
+    mocker.patch('pkgconf._path_entrypoints.scan_entry_points', return_value=original_eps)
+    calls = []
+
+    def make_context(context_id):
+        def run(fn, names):
+            assert fn is pkgconf._path_entrypoints.module_paths
+            calls.append((context_id, names))
+            return [(True, f'/{name}') for name in names]
+
+        return run
+
+    mocker.patch('pkgconf._path_entrypoints.isolated_contexts', return_value=[make_context(0), make_context(1)])
+
+    eps = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=4)
+
+    assert [ep.path for ep in eps] == ['/a', '/b', '/c', '/d', '/e']
+    # A single round trip per context
+    assert sorted(calls) == [(0, ['a', 'c', 'e']), (1, ['b', 'd'])]
+
+
+def test_pool_size(monkeypatch):
+    monkeypatch.setenv('PKGCONF_PYPI_MAX_WORKERS', '4')
+    per_context = pkgconf._path_entrypoints._MIN_ENTRYPOINTS_PER_CONTEXT
+    assert pkgconf._path_entrypoints.pool_size(0) == 1
+    assert pkgconf._path_entrypoints.pool_size(32) == 1
+    assert pkgconf._path_entrypoints.pool_size(2 * per_context) == 2
+    assert pkgconf._path_entrypoints.pool_size(10 * per_context) == 4
+    assert pkgconf._path_entrypoints.pool_size(10 * per_context, 3) == 3
+
+
+def test_translation_first(mocker, make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo.pkgconf'}, files=['foo/__init__.py', 'foo/pkgconf/__init__.py'])
+    make_dist('namespace', pkg_config={'namespace': 'namespace'}, files=['namespace/namespace.pc'])
+    run = mocker.patch(
+        'pkgconf._path_entrypoints.run_in_isolated_context',
+        return_value=[(True, os.fspath(site_dir / 'namespace'))],
+    )
+
+    eps = pkgconf._path_entrypoints.entry_points(group='pkg_config', strategy='translation-first', max_workers=1)
+
+    assert [ep.path for ep in eps] == [os.fspath(site_dir / 'foo' / 'pkgconf'), os.fspath(site_dir / 'namespace')]
+    # Only the namespace package needed the import system
+    run.assert_called_once_with(pkgconf._path_entrypoints.module_paths, ['namespace'])
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown resolution strategy 'foo'"):
+        pkgconf._path_entrypoints.resolution_strategy('foo')
+
+
+def test_scan_entry_points(make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo.pkgconf'})
+    make_dist('bar', pkg_config={'bar': 'bar'})
+    make_dist('baz')
+    # Shadowed by the distribution earlier in the path
+    shadowed = site_dir.parent / 'shadowed'
+    shadowed.joinpath('foo-2.0.0.dist-info').mkdir(parents=True)
+    shadowed.joinpath('foo-2.0.0.dist-info', 'entry_points.txt').write_text('[pkg_config]\nfoo = foo.other\n')
+
+    eps = pkgconf._path_entrypoints.scan_entry_points('pkg_config', [os.fspath(site_dir), os.fspath(shadowed)])
+
+    assert sorted((ep.name, ep.value, ep.dist.version) for ep in eps) == [
+        ('bar', 'bar', '1.0.0'),
+        ('foo', 'foo.pkgconf', '1.0.0'),
+    ]
+    # Same result as importlib.metadata for sys.path
+    assert {(ep.name, ep.value) for ep in pkgconf._path_entrypoints.scan_entry_points('pkg_config')} == {
+        (ep.name, ep.value) for ep in importlib.metadata.entry_points(group='pkg_config')
+    }
+
+
+def test_scan_entry_points_index(mocker, make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo'})
+    # Directories modified recently aren't indexed
+    os.utime(site_dir, ns=(0, 0))
+    groups = mocker.spy(pkgconf._path_entrypoints, '_entry_point_groups')
+
+    assert [ep.name for ep in pkgconf._path_entrypoints.scan_entry_points('pkg_config', [os.fspath(site_dir)])] == ['foo']
+    assert [ep.name for ep in pkgconf._path_entrypoints.scan_entry_points('pkg_config', [os.fspath(site_dir)])] == ['foo']
+    assert groups.call_count == 1
+
+    # Installing a distribution changes the directory mtime
+    make_dist('bar', pkg_config={'bar': 'bar'})
+    eps = pkgconf._path_entrypoints.scan_entry_points('pkg_config', [os.fspath(site_dir)])
+    assert sorted(ep.name for ep in eps) == ['bar', 'foo']
+
+
+def test_static_path(mocker, make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo'}, files=['foo/data/foo.pc'])
+    pkgconf.build.write_metadata(site_dir / 'foo-1.0.0.dist-info', {'foo': 'foo/data'})
+    run = mocker.patch('pkgconf._path_entrypoints.run_in_isolated_context')
+
+    eps = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)
+
+    assert [ep.path for ep in eps] == [os.fspath(site_dir / 'foo' / 'data')]
+    run.assert_not_called()
+
+
+def test_incremental_resolution(mocker, make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo'}, files=['foo/foo.pc'])
+    make_dist('bar', pkg_config={'bar': 'bar'}, files=['bar/bar.pc'])
+
+    def module_paths(fn, names):
+        return [(True, os.fspath(site_dir / name)) for name in names]
+
+    run = mocker.patch('pkgconf._path_entrypoints.run_in_isolated_context', side_effect=module_paths)
+
+    def resolve():
+        return [ep.path for ep in pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)]
+
+    assert resolve() == [os.fspath(site_dir / 'bar'), os.fspath(site_dir / 'foo')]
+    run.assert_called_once_with(pkgconf._path_entrypoints.module_paths, ['bar', 'foo'])
+
+    # Nothing changed
+    run.reset_mock()
+    assert resolve() == [os.fspath(site_dir / 'bar'), os.fspath(site_dir / 'foo')]
+    run.assert_not_called()
+
+    # Only the modified distribution is resolved again
+    os.utime(site_dir / 'foo-1.0.0.dist-info' / 'RECORD', ns=(0, 0))
+    assert resolve() == [os.fspath(site_dir / 'bar'), os.fspath(site_dir / 'foo')]
+    run.assert_called_once_with(pkgconf._path_entrypoints.module_paths, ['foo'])
+
+    # Stale paths are resolved again
+    run.reset_mock()
+    shutil.rmtree(site_dir / 'bar')
+    resolve()
+    run.assert_called_once_with(pkgconf._path_entrypoints.module_paths, ['bar'])
+
+
+def test_state_key_path_distribution(make_dist):
+    dist = make_dist('foo', pkg_config={'foo': 'foo'})
+    [original] = dist.entry_points.select(group='pkg_config')
+    assert pkgconf._path_entrypoints.EntryPoint(original)._state_key
+
+    # Other distributions aren't kept in the state, even if they have the same internals
+    class CustomDistribution(importlib.metadata.Distribution):
+        _path = dist._path
+        read_text = dist.read_text
+        locate_file = dist.locate_file
+
+    [original] = CustomDistribution().entry_points.select(group='pkg_config')
+    assert pkgconf._path_entrypoints.EntryPoint(original)._state_key is None
+
+
+def test_negative_result_cache(mocker, make_dist, site_dir):
+    make_dist('broken', pkg_config={'broken': 'pkgconf_test_broken'})
+    run = mocker.patch(
+        'pkgconf._path_entrypoints.run_in_isolated_context',
+        return_value=[(False, 'RuntimeError: error on import')],
+    )
+
+    with pytest.warns(pkgconf._path_entrypoints.PathWarning, match=r'see log for details'):
+        eps = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)
+    assert [ep.path for ep in eps] == [os.fspath(site_dir / 'pkgconf_test_broken')]
+    run.assert_called_once()
+
+    # The failure is remembered, and reported with a single warning
+    run.reset_mock()
+    with pytest.warns(pkgconf._path_entrypoints.PathWarning) as record:
+        eps = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)
+    assert [ep.path for ep in eps] == [os.fspath(site_dir / 'pkgconf_test_broken')]
+    assert [str(warning.message) for warning in record] == [
+        (
+            'Failed to resolve the entrypoint path via the import system (cached result): '
+            "ModuleNotFoundError: No module named 'pkgconf_test_broken'"
+        )
+    ]
+    run.assert_not_called()
+
+
+def test_batch_timeout(mocker, make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo', 'bar': 'bar'})
+    run = mocker.patch('pkgconf._path_entrypoints.run_in_isolated_context', side_effect=TimeoutError('timed out'))
+
+    with pytest.warns(pkgconf._path_entrypoints.PathWarning):
+        eps = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)
+
+    # The entrypoints fallback to translation, without waiting for another timeout each
+    run.assert_called_once()
+    assert [(ep.path, ep.resolution.strategy, ep.resolution.error) for ep in eps] == [
+        (os.fspath(site_dir / name), 'fallback', 'TimeoutError: timed out') for name in ('bar', 'foo')
+    ]
+
+
+def test_call_with_deadline(monkeypatch):
+    def call(fn, *args):
+        return fn(*args)
+
+    call_with_deadline = pkgconf._path_entrypoints._call_with_deadline
+    assert call_with_deadline(call, operator.add, 1, 2) == 3
+    with pytest.raises(ZeroDivisionError):
+        call_with_deadline(call, operator.truediv, 1, 0)
+
+    monkeypatch.setenv('PKGCONF_PYPI_WORKER_TIMEOUT', '0.1')
+    with pytest.raises(TimeoutError):
+        call_with_deadline(call, time.sleep, 1)
+
+
+def test_worker(monkeypatch):
+    worker = pkgconf._path_entrypoints._Worker()
+    try:
+        # Several threads can have requests in flight at the same time
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            assert list(executor.map(lambda i: worker(operator.add, i, 1), range(20))) == list(range(1, 21))
+        with pytest.raises(ZeroDivisionError):
+            worker(operator.truediv, 1, 0)
+
+        # Calls that time out kill the worker, and the next call starts a new one
+        pid = worker(os.getpid)
+        monkeypatch.setenv('PKGCONF_PYPI_WORKER_TIMEOUT', '0.5')
+        with pytest.raises(TimeoutError):
+            worker(time.sleep, 10)
+        assert worker(os.getpid) != pid
+
+        # Same if the worker dies
+        pid = worker(os.getpid)
+        with pytest.raises(RuntimeError, match='Subprocess died'):
+            worker(os._exit, 1)
+        assert worker(os.getpid) != pid
+    finally:
+        worker.close()
+
+
+def test_worker_sys_path(site_dir):
+    site_dir.joinpath('pkgconf_test_module', '__init__.py').parent.mkdir()
+    site_dir.joinpath('pkgconf_test_module', '__init__.py').touch()
+    worker = pkgconf._path_entrypoints._Worker()
+    try:
+        # The worker runs in isolated mode, with our sys.path
+        worker.start()
+        assert worker(pkgconf._path_entrypoints.module_path, 'pkgconf_test_module') == os.fspath(
+            site_dir / 'pkgconf_test_module'
+        )
+    finally:
+        worker.close()
+
+
+def test_resolution(mocker, make_dist, site_dir):
+    make_dist('foo', pkg_config={'foo': 'foo'}, files=['foo/foo.pc'])
+    run = mocker.patch('pkgconf._path_entrypoints.run_in_isolated_context', return_value=[(True, os.fspath(site_dir / 'foo'))])
+
+    [ep] = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)
+
+    assert ep.resolution.path == ep.path == os.fspath(site_dir / 'foo')
+    assert ep.resolution.strategy == 'import-system'
+    assert ep.resolution.duration >= 0
+    assert ep.resolution.error is None
+    assert not ep.resolution.cached
+    # The path is only resolved once
+    assert ep.resolution is ep.resolution
+    run.assert_called_once()
+
+    [ep] = pkgconf._path_entrypoints.entry_points(group='pkg_config', max_workers=1)
+    assert ep.resolution.cached
+    assert ep.resolution.strategy == 'import-system'
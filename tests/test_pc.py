@@ -0,0 +1,135 @@
+import os
+import textwrap
+
+import pytest
+
+import pkgconf
+import pkgconf._pc
+
+
+@pytest.fixture
+def search_dir(tmp_path):
+    files = {
+        'a.pc': """
+            prefix=/opt/a
+            libdir=${prefix}/lib
+            includedir=${prefix}/include
+
+            Name: a
+            Description: A
+            Version: 1.2.3
+            Requires: b >= 1.0, c
+            Requires.private: d
+            Cflags: -I${includedir} -DA
+            Libs: -L${libdir} -la -lm
+            Libs.private: -lpthread
+        """,
+        'b.pc': """
+            prefix=/opt/b
+            Name: b
+            Description: B
+            Version: 2.0
+            Requires: c
+            Cflags: -I${prefix}/include -DB -I/opt/a/include
+            Libs: -L${prefix}/lib -lb -lm
+        """,
+        'c.pc': """
+            Name: c
+            Description: C
+            Version: 0.1
+            Cflags: -I/opt/c/include
+            Libs: -L/opt/c/lib -lc2 -Wl,--as-needed
+        """,
+        'd.pc': """
+            Name: d
+            Description: D
+            Version: 3
+            Cflags: -I${pcfiledir}/include -pthread # comment
+            Libs: -L/opt/d/lib \\
+                -ld
+            Libs.private: -ldl
+        """,
+        'quoted.pc': """
+            Name: quoted
+            Description: Quoted
+            Version: 1
+            Cflags: "-I/opt/with space"
+        """,
+    }
+    for name, content in files.items():
+        tmp_path.joinpath(name).write_text(textwrap.dedent(content).lstrip())
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    ('args', 'output'),
+    [
+        (['--exists', 'a'], ''),
+        (['--modversion', 'a', 'b'], '1.2.3\n2.0\n'),
+        (['--variable=libdir', 'a'], '/opt/a/lib\n'),
+        (['--variable', 'prefix', 'a', 'b'], '/opt/a /opt/b\n'),
+        (['--cflags', 'a'], '-I/opt/a/include -DA -I/opt/b/include -DB -I/opt/c/include -I{dir}/include -pthread \n'),
+        (['--cflags', 'a', 'b'], '-I/opt/a/include -DA -I/opt/b/include -I/opt/c/include -I{dir}/include -pthread -DB \n'),
+        (['--libs', 'a'], '-L/opt/a/lib -la -L/opt/b/lib -lb -lm -L/opt/c/lib -lc2 -Wl,--as-needed \n'),
+        (['--libs', 'c', 'b'], '-L/opt/c/lib -L/opt/b/lib -lb -lm -lc2 -Wl,--as-needed \n'),
+        (
+            ['--cflags', '--static', 'a'],
+            '-I/opt/a/include -DA -I/opt/b/include -DB -I/opt/c/include -I{dir}/include -pthread \n',
+        ),
+        (['--cflags', '--libs', 'c'], '-I/opt/c/include -L/opt/c/lib -lc2 -Wl,--as-needed \n'),
+        (['--libs', '--cflags', 'c'], '-I/opt/c/include -L/opt/c/lib -lc2 -Wl,--as-needed \n'),
+        (
+            ['--cflags', 'a', '>=', '1.0'],
+            '-I/opt/a/include -DA -I/opt/b/include -DB -I/opt/c/include -I{dir}/include -pthread \n',
+        ),
+    ],
+)
+def test_run(search_dir, args, output):
+    env = {'PKG_CONFIG_PATH': os.fspath(search_dir)}
+    assert pkgconf._pc.run(args, env) == (0, output.format(dir=search_dir), '')
+
+
+@pytest.mark.parametrize(
+    'args',
+    [
+        ['--cflags', 'inexistent'],
+        ['--cflags', 'a', '>', '1.2.3'],
+        ['--cflags', 'quoted'],
+        ['--cflags-only-I', 'a'],
+        ['--modversion', '--cflags', 'a'],
+        # -lm is repeated in the static dependency graph, and pkgconf keeps it
+        ['--libs', '--static', 'a'],
+    ],
+)
+def test_run_unsupported(search_dir, args):
+    with pytest.raises(pkgconf._pc.Unsupported):
+        pkgconf._pc.run(args, {'PKG_CONFIG_PATH': os.fspath(search_dir)})
+
+
+@pytest.mark.parametrize(
+    ('a', 'b', 'result'),
+    [
+        ('1.0', '1.0', 0),
+        ('1.0', '1.0.0', -1),
+        ('1.10', '1.9', 1),
+        ('1.0a', '1.0', 1),
+        ('1.0~rc1', '1.0', -1),
+        ('1.a', '1.1', -1),
+    ],
+)
+def test_compare_versions(a, b, result):
+    assert pkgconf._pc.compare_versions(a, b) == result
+
+
+def test_run_pkgconf_in_process(fake_pkgconf, search_dir, monkeypatch):
+    monkeypatch.setenv('PKG_CONFIG_PATH', os.fspath(search_dir))
+    monkeypatch.setenv('PKGCONF_PYPI_ENGINE', 'python')
+    monkeypatch.setenv('PKGCONF_PYPI_NO_CACHE', '1')
+
+    process = pkgconf.run_pkgconf('--modversion', 'c', capture_output=True, text=True)
+    assert process.stdout == '0.1\n'
+    assert not fake_pkgconf.exists()
+
+    # Unsupported queries fallback to pkgconf
+    pkgconf.run_pkgconf('--modversion', 'inexistent', capture_output=True)
+    assert fake_pkgconf.read_text() == 'x'
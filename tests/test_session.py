@@ -0,0 +1,56 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+import pkgconf
+
+
+def test_session(fake_pkgconf, mocker):
+    session = pkgconf.Session(env={'PKG_CONFIG_PATH': '/bar'})
+    assert pkgconf.get_pkg_config_path.call_count == 1
+
+    assert session.cflags('foo') == ['--cflags', 'foo', f'/bar{os.pathsep}/foo']
+    assert session.libs('foo', static=True) == ['--libs', '--static', 'foo', f'/bar{os.pathsep}/foo']
+    assert session.modversion('foo') == f'--modversion foo /bar{os.pathsep}/foo'
+
+    # Results are memoized, and the environment isn't recalculated
+    assert session.cflags('foo') == ['--cflags', 'foo', f'/bar{os.pathsep}/foo']
+    assert fake_pkgconf.read_text() == 'xxx'
+    assert pkgconf.get_pkg_config_path.call_count == 1
+
+    pkgconf.get_pkg_config_path.return_value = ['/baz']
+    session.refresh()
+    assert session.cflags('foo') == ['--cflags', 'foo', f'/bar{os.pathsep}/baz']
+    assert fake_pkgconf.read_text() == 'xxxx'
+
+
+def test_query_result_check():
+    result = pkgconf.QueryResult(('--cflags', 'foo'), 1, '', 'Package foo was not found')
+
+    assert not result.ok
+    with pytest.raises(subprocess.CalledProcessError):
+        result.check()
+
+
+def test_run_many(fake_pkgconf):
+    queries = [['--cflags', f'foo{i}'] for i in range(20)]
+
+    results = pkgconf.run_many(queries, max_workers=4)
+
+    assert [result.flags[:2] for result in results] == queries
+    assert fake_pkgconf.read_text() == 'x' * 20
+    assert pkgconf.get_pkg_config_path.call_count == 1
+
+
+def test_arun_pkgconf(fake_pkgconf):
+    async def main():
+        session = pkgconf.Session()
+        return await asyncio.gather(*(pkgconf.arun_pkgconf('--libs', f'foo{i}', session=session) for i in range(5)))
+
+    results = asyncio.run(main())
+
+    assert [result.flags[:2] for result in results] == [['--libs', f'foo{i}'] for i in range(5)]
+    assert all(result.ok for result in results)
+    assert pkgconf.get_pkg_config_path.call_count == 1
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+import pkgconf
+import pkgconf._path_entrypoints
+import pkgconf._trace
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / 'trace.json'
+    monkeypatch.setenv('PKGCONF_PYPI_TRACE', os.fspath(path))
+    pkgconf._trace._events.clear()
+    return path
+
+
+def load_trace(path):
+    # The closing bracket is optional in the JSON Array Format
+    return json.loads(path.read_text().rstrip().rstrip(',') + ']')
+
+
+def test_trace(trace_file, fake_pkgconf, make_dist):
+    make_dist('foo', pkg_config={'foo': 'foo'}, files=['foo/__init__.py'])
+    pkgconf._path_entrypoints.entry_points(group='pkg_config', strategy='translation-first')
+    pkgconf.run_pkgconf('--cflags', 'foo', capture_output=True, cache=False)
+    pkgconf._trace.flush()
+
+    events = {event['name']: event for event in load_trace(trace_file)}
+    assert events['process_name']['ph'] == 'M'
+    assert events['scan entrypoints']['args'] == {'select': {'group': 'pkg_config'}}
+    assert events['resolve entrypoint']['args'] == {'name': 'foo', 'value': 'foo', 'strategy': 'translation'}
+    process = events['pkgconf']
+    assert process['cat'] == 'process'
+    assert process['args']['cmd'].endswith('pkgconf --cflags foo')
+    if os.name == 'posix':
+        assert process['args']['user_time'] >= 0
+    assert all(event['pid'] == os.getpid() for event in events.values())
+    assert process['ts'] >= events['scan entrypoints']['ts'] + events['scan entrypoints']['dur']
+
+
+def test_trace_append(trace_file):
+    for name in ('foo', 'bar'):
+        with pkgconf._trace.span(name, value=1) as args:
+            args['value'] += 1
+        pkgconf._trace.flush()
+
+    assert trace_file.read_text().count('[') == 1
+    events = [event for event in load_trace(trace_file) if event['ph'] == 'X']
+    assert [(event['name'], event['args']) for event in events] == [('foo', {'value': 2}), ('bar', {'value': 2})]
+
+
+def test_trace_disabled(monkeypatch):
+    monkeypatch.delenv('PKGCONF_PYPI_TRACE', raising=False)
+    with pkgconf._trace.span('foo'):
+        pass
+    assert not pkgconf._trace._events